@@ -1,5 +1,4 @@
 import logging
-from random import randint
 from time import time
 from typing import cast
 
@@ -7,7 +6,6 @@ from geniusweb.actions.Accept import Accept
 from geniusweb.actions.Action import Action
 from geniusweb.actions.Offer import Offer
 from geniusweb.actions.PartyId import PartyId
-from geniusweb.bidspace.AllBidsList import AllBidsList
 from geniusweb.inform.ActionDone import ActionDone
 from geniusweb.inform.Finished import Finished
 from geniusweb.inform.Inform import Inform
@@ -28,6 +26,7 @@ from geniusweb.references.Parameters import Parameters
 from tudelft_utilities_logging.ReportToLogger import ReportToLogger
 
 from .utils.opponent_model import OpponentModel
+from agents.template_agent.utils.bid_sampling import ThresholdBidSampler
 import json
 import geniusweb.issuevalue.DiscreteValue
 class Agent_64(DefaultParty):
@@ -50,6 +49,7 @@ class Agent_64(DefaultParty):
 
         self.last_received_bid: Bid = None
         self.opponent_model: OpponentModel = None
+        self.bid_sampler: ThresholdBidSampler = None
         self.logger.log(logging.INFO, "party is initialized")
 
     def notifyChange(self, data: Inform):
@@ -81,6 +81,9 @@ class Agent_64(DefaultParty):
             self.domain = self.profile.getDomain()
             profile_connection.close()
 
+            # draws random bids above a utility threshold, without enumerating all bids
+            self.bid_sampler = ThresholdBidSampler(self.profile)
+
         # ActionDone informs you of an action (an offer or an accept)
         # that is performed by one of the agents (including yourself).
         elif isinstance(data, ActionDone):
@@ -247,17 +250,19 @@ class Agent_64(DefaultParty):
             Returns:
                 best_bid (Bid): the best bid the function found in the first 500 bids
         """
-        # compose a list of all possible bids
-        domain = self.profile.getDomain()
-        all_bids = AllBidsList(domain)
-
         #starting values that will get overwritten
         best_bid_score = -0.1
         best_bid = None
 
+        # only bids above the acceptable utility get a score above 0, so only sample those
+        acceptable_utility = self.calculate_current_acceptable_utility()
+
         # take 500 attempts to find a bid according to a heuristic score
         for _ in range(500):
-            bid = all_bids.get(randint(0, all_bids.size() - 1))
+            bid = self.bid_sampler.sample(acceptable_utility)
+            if bid is None:
+                # no bid is acceptable, any bid will do
+                bid = self.bid_sampler.sample()
             bid_score = self.score_bid(bid)  # can add values for parameters
             if bid_score > best_bid_score:
                 best_bid_score, best_bid = bid_score, bid
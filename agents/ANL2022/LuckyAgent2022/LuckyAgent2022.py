@@ -4,15 +4,17 @@
 #######################################################
 import json
 import logging
+from bisect import bisect_left, bisect_right
 from random import randint
 import random
 from time import time
 from tkinter.messagebox import NO
-from typing import cast
+from typing import Dict, List, Tuple, cast
 import math
 import pickle
 import os
 from statistics import mean
+import numpy as np
 from geniusweb.actions.Accept import Accept
 from geniusweb.actions.Action import Action
 from geniusweb.actions.Offer import Offer
@@ -40,13 +42,19 @@ from tudelft.utilities.immutablelist.ImmutableList import ImmutableList
 from .utils.opponent_model import OpponentModel
 from geniusweb.profile.utilityspace.LinearAdditive import LinearAdditive
 from agents.time_dependent_agent.extended_util_space import ExtendedUtilSpace
+from agents.template_agent.utils.bid_enumeration import SortedBids
 from decimal import Decimal
-from geniusweb.opponentmodel import FrequencyOpponentModel
 
 
 NUMBER_OF_GOALS = 5
 
 
+def divide_round_half_even(numerator: np.ndarray, denominator: int) -> np.ndarray:
+    """Integer division rounded half to even, like rounding the exact Decimal quotient."""
+    quotient, remainder = np.divmod(numerator, denominator)
+    return quotient + ((2 * remainder > denominator) | ((2 * remainder == denominator) & (quotient % 2 == 1)))
+
+
 class LuckyAgent2022(DefaultParty):
     """
     Template of a Python geniusweb agent.
@@ -71,6 +79,19 @@ class LuckyAgent2022(DefaultParty):
         self.my_bid_details = []
         self.best_received_bid = None
 
+        # all bids sorted on descending utility, with the negated utilities and the value index
+        # of every issue of the bids that were generated so far (ascending, for bisection)
+        self._sorted_bids: SortedBids = None
+        self._sorted_utilities: List[Decimal] = []
+        self._sorted_value_indices: List[List[int]] = []
+        # value indices of the bids of a utility band by (start, end) index in the sorted bids
+        self._band_indices: Dict[Tuple[int, int], np.ndarray] = {}
+        # frequency opponent model: how often the opponent offered every value of every issue
+        self._issues: List[str] = None
+        self._value_indices: List[Dict] = None
+        self._value_counts: List[np.ndarray] = None
+        self._num_received_bids = 0
+
         self.logger.log(logging.INFO, "party is initialized")
         self.alpha = 1.0
         self.betta = 0.0
@@ -237,10 +258,13 @@ class LuckyAgent2022(DefaultParty):
             self.profile = profile_connection.getProfile()
             self.domain = self.profile.getDomain()
 
-            # initialize FrequencyOpponentModel
-            self.opponent_model = FrequencyOpponentModel.FrequencyOpponentModel.create().With(
-                newDomain=self.profile.getDomain(),
-                newResBid=self.profile.getReservationBid())
+            # initialize the frequency opponent model
+            self._issues = sorted(self.domain.getIssues())
+            self._value_indices = [
+                {value: i for i, value in enumerate(self.domain.getValues(issue))}
+                for issue in self._issues
+            ]
+            self._value_counts = [np.zeros(len(indices), dtype=np.int64) for indices in self._value_indices]
 
             profile_connection.close()
 
@@ -325,8 +349,11 @@ class LuckyAgent2022(DefaultParty):
             bid = cast(Offer, action).getBid()
 
             # update opponent model with bid
-            self.opponent_model = self.opponent_model.WithAction(
-                action=action, progress=self.progress)
+            for issue, indices, counts in zip(self._issues, self._value_indices, self._value_counts):
+                value = bid.getValue(issue)
+                if value in indices:
+                    counts[indices[value]] += 1
+            self._num_received_bids += 1
             # set bid as last received
             self.last_received_bid = bid
             # self.received_bids.append(bid)
@@ -360,8 +387,47 @@ class LuckyAgent2022(DefaultParty):
         if not newutilspace == self._utilspace:
             self._utilspace = cast(LinearAdditive, newutilspace)
             self._extendedspace = ExtendedUtilSpace(self._utilspace)
+            self._sorted_bids = SortedBids(self._utilspace)
+            self._sorted_utilities = []
+            self._sorted_value_indices = []
+            self._band_indices.clear()
         return self._utilspace
 
+    def _band(self, low: Decimal, high: Decimal) -> Tuple[int, int]:
+        """Indices [start, end) in the sorted bids of the bids with a utility in [low, high].
+        Bids are only generated down to the lowest band that was asked for.
+        """
+        utilities = self._sorted_utilities
+        while len(utilities) < len(self._sorted_bids) and (
+            not utilities or -utilities[-1] >= low
+        ):
+            bid = self._sorted_bids[len(utilities)]
+            utilities.append(-self._sorted_bids.get_utility(len(utilities)))
+            self._sorted_value_indices.append(
+                [indices[bid.getValue(issue)] for issue, indices in zip(self._issues, self._value_indices)])
+        return bisect_left(utilities, -high), bisect_right(utilities, -low)
+
+    def _get_band_weights(self, start: int, end: int) -> np.ndarray:
+        """Opponent utilities of the bids of a band, used as weights to draw an offer.
+
+        The utility is the estimate of geniusweb's FrequencyOpponentModel: the average over the
+        issues of the fraction of the received bids that had the value of the bid, rounded to 4
+        decimals. It is computed for the whole band at once from the cached value indices, in
+        integer steps of 0.0001 such that the rounding is the same as with Decimals.
+        """
+        band = self._band_indices.get((start, end))
+        if band is None:
+            band = np.array(self._sorted_value_indices[start:end], dtype=np.int64).reshape(
+                end - start, len(self._issues))
+            self._band_indices[(start, end)] = band
+        if self._num_received_bids == 0:
+            return np.ones(end - start)
+        steps = np.zeros(end - start, dtype=np.int64)
+        for k, counts in enumerate(self._value_counts):
+            steps += divide_round_half_even(counts * 10000, self._num_received_bids)[band[:, k]]
+        utilities = divide_round_half_even(steps, len(self._issues)) / 10000
+        return np.maximum(utilities, 0.00001)
+
     def save_data(self):
         """This method is called after the negotiation is finished. It can be used to store data
         for learning capabilities. Note that no extensive calculations can be done within this method.
@@ -458,33 +524,23 @@ class LuckyAgent2022(DefaultParty):
             utility_goals.append(self.threshold_low+s*i)
         utility_goals.append(self.threshold_high)
 
-        options: ImmutableList[Bid] = self._extendedspace.getBids(
-            Decimal(random.choice(utility_goals)))
+        # bids within the tolerance below the goal, see ExtendedUtilSpace.getBids
+        goal = Decimal(random.choice(utility_goals))
+        tolerance = self._extendedspace.getTolerance()
+        start, end = self._band(goal - tolerance, goal)
 
-        opponent_utilities = []
-        for option in options:
-            if self.opponent_model != None:
-                opp_utility = float(
-                    self.opponent_model.getUtility(option))
-                if opp_utility > 0:
-                    opponent_utilities.append(opp_utility)
-                else:
-                    opponent_utilities.append(0.00001)
-            else:
-                opponent_utilities.append(0.00001)
-
-        if options.size() == 0:
+        if start == end:
             # if we can't find good bid, get max util bid....
-            options = self._extendedspace.getBids(self._extendedspace.getMax())
-            return options.get(randint(0, options.size() - 1))
-        # pick a random one.
-
-        next_bid = random.choices(list(options), weights=opponent_utilities)[0]
-        for bid_detaile in self.received_bid_details:
-            if bid_detaile.getUtility() >= self.profile.getUtility(next_bid):
-                next_bid = bid_detaile.getBid()
-
-        return random.choices(list(options), weights=opponent_utilities)[0]
+            max_utility = self._extendedspace.getMax()
+            start, end = self._band(max_utility - tolerance, max_utility)
+            if start == end:
+                # the maximum of ExtendedUtilSpace is rounded, the first bid is the best one
+                return self._sorted_bids[0]
+            return self._sorted_bids[randint(start, end - 1)]
+        # pick a random one, weighted by the utility for the opponent (like random.choices)
+        cum_weights = np.cumsum(self._get_band_weights(start, end))
+        index = int(np.searchsorted(cum_weights, random.random() * cum_weights[-1], side="right"))
+        return self._sorted_bids[start + min(index, end - start - 1)]
 
     # ************************************************************
     def f(self, t, k, e):
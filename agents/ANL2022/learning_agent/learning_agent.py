@@ -5,10 +5,6 @@ from decimal import Decimal
 from os.path import exists
 
 from geniusweb.inform.Agreements import Agreements
-from geniusweb.issuevalue.ValueSet import ValueSet
-from geniusweb.issuevalue.Value import Value
-from geniusweb.issuevalue.DiscreteValue import DiscreteValue
-from geniusweb.issuevalue.NumberValue import NumberValue
 
 import logging
 from random import randint
@@ -40,7 +36,7 @@ from tudelft_utilities_logging.ReportToLogger import ReportToLogger
 
 from .LearnedData import LearnedData
 from .NegotiationData import NegotiationData
-from .Pair import Pair
+from agents.template_agent.utils.value_frequency_model import ValueFrequencyModel
 
 # static vars
 defualtAlpha: float = 10.7
@@ -73,7 +69,7 @@ class LearningAgent(DefaultParty):
         # Expecting Lower Limit of Concession Function behavior
         # The idea here that we will keep for a negotiation scenario the most frequent
         # Issues - Values, afterwards, as a counter offer bid for each issue we will select the most frequent value.
-        self.freqMap: dict = None
+        self.freqModel: ValueFrequencyModel = None
 
         # average and standard deviation of the competition for determine "good" utility threshold
         self.avgUtil: float = 0.95
@@ -254,35 +250,8 @@ class LearningAgent(DefaultParty):
             profile_connection = ProfileConnectionFactory.create(data.getProfile().getURI(), self.getReporter())
             self.domain = profile_connection.getProfile().getDomain()
 
-            # Create a Issues-Values frequency map
-            if self.freqMap == None:
-                # Map wasn't created before, create a new instance now
-                self.freqMap = {}
-            else:
-                # Map was created before, but this is a new negotiation scenario, clear the old map.
-                self.freqMap.clear()
-
-            # Obtain all of the issues in the current negotiation domain
-            issues: set = self.domain.getIssues()
-            for s in issues:
-                # create new list of all the values for
-                p: Pair = Pair()
-                p.vList = {}
-
-                # gather type of issue based on the first element
-                vs: ValueSet = self.domain.getValues(s)
-                if isinstance(vs.get(0), DiscreteValue):
-                    p.type = 0
-                elif isinstance(vs.get(0), NumberValue):
-                    p.type = 1
-
-                # Obtain all of the values for an issue "s"
-                for v in vs:
-                    # Add a new entry in the frequency map for each(s, v, typeof(v))
-                    vStr: str = self.valueToStr(v, p)
-                    p.vList[vStr] = 0
-
-                self.freqMap[s] = p
+            # Create a Issues-Values frequency model, every negotiation scenario starts with a new model
+            self.freqModel = ValueFrequencyModel(self.domain)
 
         except:
             self.logger.log(logging.ERROR, "error settingsFunction")
@@ -415,17 +384,16 @@ class LearningAgent(DefaultParty):
                         i += 1
                     bid = maxBid
                 else:
-                    # look for bid with max utility for opponent
+                    # look for bid with max utility for opponent, score all candidates at once
                     maxOpponentUtility: float = 0.0
                     maxBid: Bid = None
-                    for i in range(2000):
-                        i: long = randint(0, self.allBidList.size())
-                        bid = self.allBidList.get(i)
-                        if self.isGood(bid) and self.isOpGood(bid):
-                            opValue = self.calcOpValue(bid)
-                            if opValue > maxOpponentUtility:
-                                maxOpponentUtility = opValue
-                                maxBid = bid
+                    candidates = [self.allBidList.get(randint(0, self.allBidList.size())) for _ in range(2000)]
+                    opValues = self.freqModel.get_values(self.freqModel.get_indices(candidates))
+                    opThreshold: float = self.getOpThreshold()
+                    for bid, opValue in zip(candidates, opValues):
+                        if opValue > opThreshold and opValue > maxOpponentUtility and self.isGood(bid):
+                            maxOpponentUtility = opValue
+                            maxBid = bid
                     bid = maxBid
 
                 bid = self.bestOfferBid if (self.progress.get(int(time.time() * 1000)) > 0.99) and self.isGood(
@@ -464,76 +432,25 @@ class LearningAgent(DefaultParty):
         return float(self.utilitySpace.getUtility(bid)) >= self.utilThreshold
 
     def calcOpValue(self, bid: Bid):
-        value: float = 0
-
-        issues = bid.getIssues()
-        valUtil: list = [0] * len(issues)
-        issWeght: list = [0] * len(issues)
-        k: int = 0  # index
-
-        for s in issues:
-            p: Pair = self.freqMap[s]
-            v: Value = bid.getValue(s)
-            vs: str = self.valueToStr(v, p)
-
-            # calculate utility of value (in the issue)
-            sumOfValues: int = 0
-            maxValue: int = 1
-            for vString in p.vList.keys():
-                sumOfValues += p.vList[vString]
-                maxValue = max(maxValue, p.vList[vString])
-
-            # calculate estimated utility of the issuevalue
-            valUtil[k] = p.vList.get(vs) / maxValue
-
-            # calculate the inverse std deviation of the array
-            mean: float = sumOfValues / len(p.vList)
-            for vString in p.vList.keys():
-                issWeght[k] += pow(p.vList.get(vString) - mean, 2)
-            issWeght[k] = 1.0 / math.sqrt((issWeght[k] + 0.1) / len(p.vList))
-
-            k += 1
-
-        sumOfWght: float = 0
-        for k in range(len(issues)):
-            value += valUtil[k] * issWeght[k]
-            sumOfWght += issWeght[k]
-
-        return value / sumOfWght
+        # the frequency model caches the value scores until the opponent makes a new offer
+        return self.freqModel.get_value(bid)
 
     def isOpGood(self, bid: Bid):
         if bid == None:
             return False
 
         value: float = self.calcOpValue(bid)
+        return value > self.getOpThreshold()
+
+    def getOpThreshold(self) -> float:
         index: int = int(((tSplit - 1) / (1 - tPhase) * (self.progress.get(int(
             time.time() * 1000)) - tPhase)))
         # change
-        opThreshold: float = max(max(2 * self.opThreshold[index] - 1, self.opReject[index]),
-                                 0.2) if self.opThreshold != None and self.opReject != None else 0.6
-        return value > opThreshold
+        return max(max(2 * self.opThreshold[index] - 1, self.opReject[index]),
+                   0.2) if self.opThreshold != None and self.opReject != None else 0.6
 
     def updateFreqMap(self, bid: Bid):
-        if not (bid == None):
-            issues = bid.getIssues()
-
-            for s in issues:
-                p: Pair = self.freqMap.get(s)
-                v: Value = bid.getValue(s)
-
-                vs: str = self.valueToStr(v, p)
-                p.vList[vs] = (p.vList.get(vs) + 1)
-
-    def valueToStr(self, v: Value, p: Pair):
-        v_str: str = ""
-        if p.type == 0:
-            v_str = cast(DiscreteValue, v).getValue()
-        elif p.type == 1:
-            v_str = cast(NumberValue, v).getValue()
-
-        if v_str == "":
-            print("Warning: Value wasn't found")
-        return v_str
+        self.freqModel.update(bid)
 
     def getPath(self, dataType: str, opponentName: str):
         return os.path.join(self.storage_dir, dataType + "_" + opponentName + ".json")
@@ -1,4 +1,4 @@
-import copy
+import heapq
 from decimal import Decimal
 from geniusweb.bidspace.AllBidsList import AllBidsList
 from geniusweb.bidspace.BidsWithUtility import BidsWithUtility
@@ -132,29 +132,44 @@ class BidChooser():
 		issue_weights = {issue: float(self.profile.getWeight(issue)) for issue in list(self.max_n_values.keys())}
 		issue_weights_sorted = dict(sorted(issue_weights.items(), key = lambda i: i[1], reverse = True))
 		issue_list = list(issue_weights_sorted.keys())
-		new_bid_pool = []
-		self._recur(self.max_n_values, issue_list, issue_weights_sorted, [], 1.0 - lowest_acceptable, new_bid_pool)
-		new_bid_pool = sorted([(bid, float(self.profile.getUtility(bid))) for bid in new_bid_pool], key = lambda bid: bid[1])
+		# Bids come out best first, the pool is sorted from worst to best
+		new_bid_pool = list(self._best_bids(self.max_n_values, issue_list, issue_weights_sorted, lowest_acceptable))
+		new_bid_pool.reverse()
 		if self.best_received_util == self.lowest_with_bids:
 			last_bid = new_bid_pool[-1][0]
 			if last_bid != self.best_received_bid:
 				new_bid_pool.insert(0, ((self.best_received_bid, float(self.profile.getUtility(self.best_received_bid)))))
 		self.bid_pool = new_bid_pool
 
-	def _recur(self, max_n_values: dict, issue_list: list, issue_weights: dict, bid: list, accumulated_loss: float, bids: list):
-		issue = issue_list[len(bid)]
-		last = len(bid) == len(issue_list) - 1
-		weight = issue_weights[issue]
-		for value, util in max_n_values[issue].items():
-			new_accumulated_loss = accumulated_loss - weight * (1.0 - util)
-			if new_accumulated_loss < 0.0:
+	def _best_bids(self, max_n_values: dict, issue_list: list, issue_weights: dict, lowest_acceptable: float):
+		"""Branch and bound search that yields (bid, utility) for all combinations of the max n values
+		with a utility of at least lowest_acceptable, best first.
+		A partial bid is a linked list (issue, value, parent), so partial bids share their prefix.
+		Its bound is its utility so far plus the best utility of the remaining issues, partial bids
+		are expanded in order of their bound, so complete bids come out in order of utility.
+		"""
+		contributions = [[(value, issue_weights[issue] * util) for value, util in max_n_values[issue].items()] for issue in issue_list]
+		# best_remaining[i] is the highest utility that issues i and later can add
+		best_remaining = [0.0] * (len(issue_list) + 1)
+		for i in reversed(range(len(issue_list))):
+			best_remaining[i] = best_remaining[i + 1] + max((c for _, c in contributions[i]), default = 0.0)
+		# The counter breaks ties, such that partial bids are never compared
+		counter = 0
+		queue = [(-best_remaining[0], counter, 0, 0.0, None)]
+		while queue:
+			negative_bound, _, depth, utility, prefix = heapq.heappop(queue)
+			if depth == len(issue_list):
+				bid_dict = {}
+				while prefix is not None:
+					issue, value, prefix = prefix
+					bid_dict[issue] = value
+				yield Bid(bid_dict), utility
 				continue
-			if not last:
-				new_bid = copy.copy(bid)
-				new_bid.append((issue, value))
-				self._recur(max_n_values, issue_list, issue_weights, new_bid, new_accumulated_loss, bids)
-			if last:
-				last_bid = copy.copy(bid)
-				last_bid.append((issue, value))
-				bids.append(Bid(dict(last_bid)))
-
+			issue = issue_list[depth]
+			for value, contribution in contributions[depth]:
+				new_utility = utility + contribution
+				bound = new_utility + best_remaining[depth + 1]
+				if bound < lowest_acceptable:
+					continue
+				counter += 1
+				heapq.heappush(queue, (-bound, counter, depth + 1, new_utility, (issue, value, prefix)))
@@ -41,6 +41,7 @@ from geniusweb.progress.ProgressTime import ProgressTime
 from geniusweb.references.Parameters import Parameters
 from tudelft_utilities_logging.ReportToLogger import ReportToLogger
 
+from agents.template_agent.utils.bid_enumeration import best_bids
 from agents.template_agent.utils.opponent_model import OpponentModel
 
 
@@ -160,34 +161,39 @@ class SmartAgent(DefaultParty):
                         self.utilitySpace: UtilitySpace.UtilitySpace = self.profileInt.getProfile()
                         self.all_bid_list = AllBidsList(domain)
 
-                        bids_zise = self.all_bid_list.size()
-                        if bids_zise < self.MAX_SEARCHABLE_BIDSPACE:
-                            r = -1
-                        elif bids_zise == self.MAX_SEARCHABLE_BIDSPACE:
-                            r = 0
+                        if isinstance(self.utilitySpace, LinearAdditiveUtilitySpace):
+                            # the optimal bid of an additive utility space is found directly,
+                            # without searching (a random subspace of) the bid space
+                            self.optimalBid, _ = next(best_bids(self.utilitySpace))
                         else:
-                            r = 1
-                        if r == 0 or r == -1:
-                            mx_util = 0
-                            bidspace_size = self.all_bid_list.size()
-                            for i in range(0, bidspace_size, 1):
-                                b: Bid = self.all_bid_list.get(i)
-                                candidate = self.utilitySpace.getUtility(b)
-                                r = candidate.compare(mx_util)
-                                if r == 1:
-                                     mx_util = candidate
-                                     self.optimalBid = b
-                        else:
-                            # Searching for best bid in random subspace
-                            mx_util = 0
-                            for attempt in range(0,self.MAX_SEARCHABLE_BIDSPACE,1):
-                                irandom = random.random(self.all_bid_list.size())
-                                b = self.all_bid_list.get(irandom)
-                                candidate = self.utilitySpace.getUtility(b)
-                                r = candidate.compare(mx_util)
-                                if r == 1:
-                                    mx_util = candidate
-                                    self.optimalBid = b
+                            bids_zise = self.all_bid_list.size()
+                            if bids_zise < self.MAX_SEARCHABLE_BIDSPACE:
+                                r = -1
+                            elif bids_zise == self.MAX_SEARCHABLE_BIDSPACE:
+                                r = 0
+                            else:
+                                r = 1
+                            if r == 0 or r == -1:
+                                mx_util = 0
+                                bidspace_size = self.all_bid_list.size()
+                                for i in range(0, bidspace_size, 1):
+                                    b: Bid = self.all_bid_list.get(i)
+                                    candidate = self.utilitySpace.getUtility(b)
+                                    r = candidate.compare(mx_util)
+                                    if r == 1:
+                                         mx_util = candidate
+                                         self.optimalBid = b
+                            else:
+                                # Searching for best bid in random subspace
+                                mx_util = 0
+                                for attempt in range(0,self.MAX_SEARCHABLE_BIDSPACE,1):
+                                    irandom = random.random(self.all_bid_list.size())
+                                    b = self.all_bid_list.get(irandom)
+                                    candidate = self.utilitySpace.getUtility(b)
+                                    r = candidate.compare(mx_util)
+                                    if r == 1:
+                                        mx_util = candidate
+                                        self.optimalBid = b
                     except:
                         raise Exception("Illegal state exception")
                 profile_connection.close()
@@ -1,12 +1,14 @@
 import logging
 import math
+from bisect import bisect_left, bisect_right
 import os.path
 import random
 import pickle
 from time import time
 from typing import cast
-from collections import defaultdict
 from typing import List
+
+import numpy as np
 from geniusweb.profileconnection.ProfileInterface import ProfileInterface
 from geniusweb.actions.Accept import Accept
 from geniusweb.actions.Action import Action
@@ -22,9 +24,6 @@ from geniusweb.bidspace.AllBidsList import AllBidsList
 from geniusweb.party.Capabilities import Capabilities
 from geniusweb.party.DefaultParty import DefaultParty
 from geniusweb.utils import val
-from geniusweb.issuevalue.Value import Value
-from geniusweb.issuevalue import DiscreteValue
-from geniusweb.issuevalue import NumberValue
 from geniusweb.inform.Agreements import Agreements
 from geniusweb.references.Parameters import Parameters
 from geniusweb.profileconnection.ProfileConnectionFactory import (
@@ -32,8 +31,10 @@ from geniusweb.profileconnection.ProfileConnectionFactory import (
 )
 from geniusweb.progress.ProgressRounds import ProgressRounds
 
+from agents.template_agent.utils.value_frequency_model import ValueFrequencyModel
+from utils.domain_bundle import get_sorted_bids
+
 from .utils.utils import get_ms_current_time
-from .utils.pair import Pair
 from .utils.persistent_data import PersistentData
 from .utils.negotiation_data import NegotiationData
 
@@ -67,7 +68,7 @@ class SuperAgent(DefaultParty):
         # self._data_paths: List[str] = []
         self._negotiation_data_paths: List[str] = []
         self._opponent_name = None
-        self._freq_map = defaultdict()
+        self._freq_model: ValueFrequencyModel = None
         self._avg_utility = 0.95
         self._std_utility = 0.15
         self._util_threshold = 0.95
@@ -86,6 +87,10 @@ class SuperAgent(DefaultParty):
         self._all_bid_list: AllBidsList = None
         self._sorted_bid_list: List = None
         self._len_sorted_bid_list: int = 0
+        # negated utilities of the sorted bid list (ascending), for bisect lookups
+        self._sorted_neg_utilities: List[float] = None
+        # index of the value of every issue (see ValueFrequencyModel) of every bid in the sorted bid list
+        self._sorted_value_indices: np.ndarray = None
         self._storage_dir: str = None
 
     def create_empty_negotiation_data(self, opponent_name):
@@ -116,14 +121,9 @@ class SuperAgent(DefaultParty):
             self._persistent_data: PersistentData = PersistentData()
 
     def first_better_then(self, utility):
-        idx = None
-        try:
-            idx = next(len(self._sorted_bid_list) - 1 - x for x, val in enumerate(self._sorted_bid_list[-1::-1]) if
-                               self.calc_utility(val) > utility)
-        except StopIteration:
-            pass
-        finally:
-            return idx
+        # the bids with a utility above the given utility are a prefix of the sorted bid list
+        num_better = bisect_left(self._sorted_neg_utilities, -float(utility))
+        return num_better - 1 if num_better > 0 else None
 
     def last_bids(self, good_bid: int):
         # this session's max utility got
@@ -147,7 +147,7 @@ class SuperAgent(DefaultParty):
         if good_bid == 0:
             bid = self._optimal_bid
         else:
-            bid = max(self._sorted_bid_list[0:good_bid], key=self.calc_op_value)
+            bid = self._sorted_bid_list[int(np.argmax(self.calc_op_values(0, good_bid)))]
 
         self.getReporter().log(logging.INFO, "chosen bid utility: {}".format(self._utility_space.getUtility(bid)))
         return bid
@@ -189,29 +189,23 @@ class SuperAgent(DefaultParty):
                 self._profile = self._profile_interface.getProfile()
                 self._domain = self._profile.getDomain()
 
-                if self._freq_map is None:
-                    self._freq_map = defaultdict()
-                else:
-                    self._freq_map.clear()
-
-                issues = self._domain.getIssues()
-                for issue in issues:
-                    p = Pair()
-                    vs = self._domain.getValues(issue)
-                    if isinstance(vs.get(0), DiscreteValue.DiscreteValue):
-                        p.value_type = 0
-                    elif isinstance(vs.get(0), NumberValue.NumberValue):
-                        p.value_type = 1
-                    for v in vs:
-                        vstr = self.value_to_str(v, p)
-                        p.vlist[vstr] = 0
-                    self._freq_map[issue] = p
+                self._freq_model = ValueFrequencyModel(self._domain)
 
                 self._utility_space = self._profile_interface.getProfile()
-                self._all_bid_list: AllBidsList = AllBidsList(domain=self._domain)
-                self._sorted_bid_list = sorted(AllBidsList(domain=self._domain),
-                                               key=self._utility_space.getUtility, reverse=True)
+                # the domain bundle has the bids sorted on utility already, if it was built
+                sorted_bids = get_sorted_bids(str(settings.getProfile().getURI()))
+                if sorted_bids is not None:
+                    self._sorted_bid_list, utilities = sorted_bids
+                    self._sorted_neg_utilities = (-utilities).tolist()
+                else:
+                    self._all_bid_list: AllBidsList = AllBidsList(domain=self._domain)
+                    # compute every utility once, and keep them next to the sorted bid list
+                    bid_utilities = sorted(((self._utility_space.getUtility(bid), bid) for bid in self._all_bid_list),
+                                           key=lambda x: x[0], reverse=True)
+                    self._sorted_bid_list = [bid for _, bid in bid_utilities]
+                    self._sorted_neg_utilities = [-float(utility) for utility, _ in bid_utilities]
                 self._len_sorted_bid_list = len(self._sorted_bid_list)
+                self._sorted_value_indices = self._freq_model.get_indices(self._sorted_bid_list)
                 # after sort of bid list the optimal bid is in the first element
                 self._optimal_bid = self._sorted_bid_list[0]
 
@@ -288,17 +282,6 @@ class SuperAgent(DefaultParty):
         if self._profile_interface is not None:
             self._profile_interface.close()
 
-    def value_to_str(self, v: Value, p: Pair) -> str:
-        v_str = ""
-        if p.value_type == 0:
-            v_str = str(cast(DiscreteValue, v).getValue())
-        elif p.value_type == 1:
-            v_str = str(cast(NumberValue, v).getValue())
-
-        if v_str == "":
-            self.getReporter().log(logging.WARNING, "Warning: Value wasn't found")
-        return v_str
-
     def process_action(self, action: Action):
         if isinstance(action, Offer):
             self._last_received_bid = cast(Offer, action).getBid()
@@ -307,49 +290,25 @@ class SuperAgent(DefaultParty):
             self._negotiation_data.add_bid_util(util_value)
 
     def update_freq_map(self, bid: Bid):
-        if bid is not None:
-            issues = bid.getIssues()
-            for issue in issues:
-                p: Pair = self._freq_map[issue]
-                v: Value = bid.getValue(issue)
-                vs: str = self.value_to_str(v, p)
-                p.vlist[vs] = p.vlist[vs] + 1
+        self._freq_model.update(bid)
 
     def calc_op_value(self, bid: Bid):
-        value: float = 0
-        issues: set[str] = bid.getIssues()
-        val_util: list[float] = [0] * len(issues)
-        is_weight: list[float] = [0] * len(issues)
-        k: int = 0
-        for issue in issues:
-            p: Pair = self._freq_map[issue]
-            v: Value = bid.getValue(issue)
-            vs: str = self.value_to_str(v=v, p=p)
-            sum_of_values = 0
-            max_value = 1
-            for vString in p.vlist.keys():
-                sum_of_values = sum_of_values + p.vlist.get(vString)
-                max_value = max(max_value, p.vlist.get(vString))
-            val_util[k] = float(p.vlist.get(vs)) / max_value
-            mean = sum_of_values / len(p.vlist)
-            for v_string in p.vlist.keys():
-                is_weight[k] = is_weight[k] + math.pow(p.vlist.get(v_string) - mean, 2)
-            is_weight[k] = 1 / math.sqrt((is_weight[k] + 0.1) / len(p.vlist))
-            k = k + 1
-        sum_of_weight = 0
-        for k in range(len(issues)):
-            value = value + val_util[k] * is_weight[k]
-            sum_of_weight = sum_of_weight + is_weight[k]
-        return value / sum_of_weight
+        return self._freq_model.get_value(bid)
+
+    def calc_op_values(self, start: int, end: int) -> np.ndarray:
+        # calc_op_value of all bids in self._sorted_bid_list[start:end] at once
+        return self._freq_model.get_values(self._sorted_value_indices[start:end])
+
+    def calc_op_threshold(self):
+        index = int(
+            ((self.t_split - 1) / (1 - self.t_phase) * (self._progress.get(get_ms_current_time()) - self.t_phase)))
+        return max(1 - 2 * self.op_threshold[index], 0.2) if self.op_threshold is not None else 0.6
 
     def is_op_good(self, bid: Bid):
         if bid is None:
             return False
         value = self.calc_op_value(bid=bid)
-        index = int(
-            ((self.t_split - 1) / (1 - self.t_phase) * (self._progress.get(get_ms_current_time()) - self.t_phase)))
-        op_threshold = max(1 - 2 * self.op_threshold[index], 0.2) if self.op_threshold is not None else 0.6
-        return value > op_threshold
+        return value > self.calc_op_threshold()
         # index = (int)((t_split - 1) / (1 - t_phase) * (progress.get(System.currentTimeMillis()) - t_phase));
 
     def is_last_turn(self):
@@ -374,6 +333,9 @@ class SuperAgent(DefaultParty):
     def is_good(self, bid):
         if bid is None:
             return False
+        return float(self.calc_utility(bid)) >= self.calc_util_threshold()
+
+    def calc_util_threshold(self):
         max_value = 0.95 if self._optimal_bid is None else 0.95 * float(self.calc_utility(self._optimal_bid))
         avg_max_utility = self._persistent_data.get_avg_max_utility(self._opponent_name) \
             if self._persistent_data._known_opponent(self._opponent_name) \
@@ -384,13 +346,12 @@ class SuperAgent(DefaultParty):
             self.alpha) - 1)
         if self._util_threshold < self._min_utility:
             self._util_threshold = self._min_utility
-        return float(self.calc_utility(bid)) >= self._util_threshold
+        return self._util_threshold
 
     def first_is_good_idx(self):
-        for i in range(len(self._sorted_bid_list)):
-            if not self.is_good(self._sorted_bid_list[i]):
-                return i
-        return len(self._sorted_bid_list) - 1
+        # the good bids are a prefix of the sorted bid list, this is the index of the first bid that is not good
+        num_good = bisect_right(self._sorted_neg_utilities, -self.calc_util_threshold())
+        return min(num_good, len(self._sorted_bid_list) - 1)
 
     def on_negotiation_near_end(self):
         slice_idx = self.first_is_good_idx()
@@ -411,11 +372,10 @@ class SuperAgent(DefaultParty):
 
         slice_idx = self.first_is_good_idx()
         end_slice = int(min(slice_idx + 0.005 * self._len_sorted_bid_list - 1, self._len_sorted_bid_list - 1))
-        for i in range(slice_idx, 0, -1):
-            tmp_bid = self._sorted_bid_list[i]
-            if tmp_bid == self._optimal_bid or self.is_op_good(tmp_bid):
-                bid = tmp_bid
-                break
+        # the last bid in the slice (leaving out the optimal bid at index 0) that is good for the opponent
+        op_good = np.flatnonzero(self.calc_op_values(1, slice_idx + 1) > self.calc_op_threshold())
+        if len(op_good) > 0:
+            bid = self._sorted_bid_list[1 + op_good[-1]]
         if self._progress.get(get_ms_current_time()) > 0.992 and self.is_good(self._best_offer_bid):
             bid = self._best_offer_bid
         if bid is None or not self.is_good(bid):
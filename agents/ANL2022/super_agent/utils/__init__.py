@@ -1,4 +1,3 @@
-from .pair import Pair
 from .persistent_data import PersistentData
 from .negotiation_data import NegotiationData
 from .utils import get_ms_current_time
@@ -23,6 +23,7 @@ from geniusweb.profileconnection.ProfileConnectionFactory import (
 )
 from geniusweb.progress.Progress import Progress
 from .acceptance_strategy import AcceptanceStrategy
+from utils.domain_bundle import get_sorted_bids
 from geniusweb.progress.ProgressRounds import ProgressRounds
 from tudelft_utilities_logging.Reporter import Reporter
 
@@ -89,8 +90,13 @@ class Agent18(DefaultParty):
                 info.getProfile().getURI(), self.getReporter()
             )
 
-            self._bid_list = sorted(AllBidsList(self._profile.getProfile().getDomain()),
-                                    key=self._profile.getProfile().getUtility, reverse=True)
+            # the domain bundle has the bids sorted on utility already, if it was built
+            sorted_bids = get_sorted_bids(str(info.getProfile().getURI()))
+            if sorted_bids is not None:
+                self._bid_list = sorted_bids[0]
+            else:
+                self._bid_list = sorted(AllBidsList(self._profile.getProfile().getDomain()),
+                                        key=self._profile.getProfile().getUtility, reverse=True)
             self._opponent_model = freq_opp_mod.FrequencyOpponentModel(self._profile.getProfile().getDomain(), {}, 0,
                                                                        None).With(
                 self._profile.getProfile().getDomain(), None)
@@ -69,6 +69,9 @@ class Agent3(DefaultParty):
         self._best_received_bid: Bid = None
         # Progress when the bids were reranked last time
         self._last_calculation_progress = 0
+        # Own utility and value index of every issue of every possible bid (in the same order)
+        self._possible_bid_utilities = None
+        self._possible_bid_indices = None
         # Willingness to make big concessions (rerank bids)
         self._big_concessions_index = 0
         # Willingness to make small concessions
@@ -386,7 +389,7 @@ class Agent3(DefaultParty):
 
             # Sort by utility in descending order
             possible_bids.sort(key=lambda x: x[1], reverse=True)
-            self._possible_bids = possible_bids
+            self._set_possible_bids(possible_bids)
             return
 
         # On large domains we need to limit the number of bids taken into consideration
@@ -412,12 +415,38 @@ class Agent3(DefaultParty):
             possible_bids.append([max_bid, self._profile.getProfile().getUtility(max_bid), 0])
             # Sort by utility in descending order
             possible_bids.sort(key=lambda x: x[1], reverse=True)
-            self._possible_bids = possible_bids
+            self._set_possible_bids(possible_bids)
+
+    def _set_possible_bids(self, possible_bids):
+        """Store the possible bids along with arrays of their utility and values, such that
+        they can be reranked without evaluating every bid separately.
+        """
+        self._possible_bids = possible_bids
+        value_indices = {issue: {value: i for i, value in enumerate(values)}
+                         for issue, values in self._stat_dict.items()}
+        self._possible_bid_utilities = np.array([float(x[1]) for x in possible_bids])
+        self._possible_bid_indices = np.array(
+            [[value_indices[issue][x[0].getValue(issue)] for issue in self._stat_dict] for x in possible_bids],
+            dtype=np.int64).reshape(len(possible_bids), len(self._stat_dict))
 
     def _rerank_bids(self):
-        """Sort the list of all acceptable bids based on the current estimate of their welfare
+        """Sort the list of all acceptable bids based on the current estimate of their welfare.
+        The welfare of all bids is calculated in one pass over the arrays of the possible bids.
         """
-        self._possible_bids.sort(key=lambda x: self._calculate_welfare(x[0]), reverse=True)
+        opponent_utilities = np.zeros(len(self._possible_bids))
+        for k, issue in enumerate(self._stat_dict):
+            value_weights = np.array(list(self._opponent_value_weights[issue].values()), dtype=float)
+            opponent_utilities += self._opponent_weights[issue] * value_weights[self._possible_bid_indices[:, k]]
+        welfare = self._selfishness_coefficient * self._possible_bid_utilities \
+                  + (1 - self._selfishness_coefficient) * opponent_utilities
+
+        # Stable, such that bids with equal welfare stay in the previous order
+        order = np.argsort(-welfare, kind="stable")
+        self._possible_bids = [self._possible_bids[i] for i in order]
+        for bid_data, opponent_utility in zip(self._possible_bids, opponent_utilities[order]):
+            bid_data[2] = opponent_utility
+        self._possible_bid_utilities = self._possible_bid_utilities[order]
+        self._possible_bid_indices = self._possible_bid_indices[order]
 
     def _calculate_welfare(self, bid, method="weighted_sum") -> Decimal:
         """Calculate welfare which is understood as the sum of own and opponent's utilities.
@@ -1,11 +1,12 @@
 from abc import abstractmethod
+from itertools import takewhile
 import numpy as np
 from typing import List, Union
 
-from geniusweb.bidspace.AllBidsList import AllBidsList
 from geniusweb.issuevalue.Bid import Bid
 from geniusweb.profileconnection.ProfileInterface import ProfileInterface
 
+from agents.template_agent.utils.bid_enumeration import best_bids
 from .utility import AgentUtility
 
 
@@ -38,7 +39,7 @@ class BiddingStrategyDeterministic(AbstractBiddingStrategy):
         if profile is not None:
             self.bids = self.most_to_least_likely()
         else:
-            self.bids = []
+            self.bids = iter([])
 
     def set_profile(self, profile):
         """Setter for profile interface, intializes bids list"""
@@ -49,9 +50,9 @@ class BiddingStrategyDeterministic(AbstractBiddingStrategy):
         """This strategy determines the rating for a set of bids and returns the bid with the highest expected opponent utility"""
         possible_bids = []
         for i in range(self._utility.speed_factor()):
-            possible_bids.append(self.bids.pop())
+            possible_bids.append(next(self.bids))
         else:
-            possible_bids.append(self.bids.pop())
+            possible_bids.append(next(self.bids))
 
         distribution = self.get_bid_distribution(possible_bids)
         bid = possible_bids[distribution.index(max(distribution))]
@@ -80,15 +81,10 @@ class BiddingStrategyDeterministic(AbstractBiddingStrategy):
 
     def most_to_least_likely(self):
         """
-        method for generating the most to least profitable bids in order
+        method for generating the most to least profitable bids in order, bids are generated
+        lazily (as (bid, utility) tuples), as only the first bids are used
         """
-        domain = self._profile.getProfile().getDomain()
-        all_bids = AllBidsList(domain)
-        bids_values = []
-        for bid in all_bids:
-            bids_values.append((bid, self._profile.getProfile().getUtility(bid)))
-        bids_values.sort(reverse=False, key=lambda x: x[1])
-        return bids_values
+        return best_bids(self._profile.getProfile())
 
     def getIssueUtilities(self, issue, issue_values):
         utility_values = []
@@ -107,9 +103,9 @@ class BiddingStrategyProbalistic(BiddingStrategyDeterministic):
     def get_bid(self):
         possible_bids = []
         for i in range(self._utility.speed_factor()):
-            possible_bids.append(self.bids.pop())
+            possible_bids.append(next(self.bids))
         else:
-            possible_bids.append(self.bids.pop())
+            possible_bids.append(next(self.bids))
 
         distribution = self.get_bid_distribution(possible_bids)
         bid = possible_bids[np.random.choice(len(possible_bids), p=distribution)]
@@ -132,10 +128,7 @@ class AgressiveBiddingStrategy(AbstractBiddingStrategy):
         return bid[0]
 
     def get_all_bids_higher_than(self, value: float) -> list:
-        domain = self._profile.getProfile().getDomain()
-        all_bids = AllBidsList(domain)
-        bids_values = []
-        for bid in all_bids:
-            bids_values.append((bid, self._profile.getProfile().getUtility(bid)))
-        bids_values.sort(reverse=False, key=lambda x: x[1])
-        return list(filter(lambda bid: bid[1] > value, bids_values))
+        # only the bids above the value are generated, in ascending order as before
+        bids_values = list(takewhile(lambda bid: bid[1] > value, best_bids(self._profile.getProfile())))
+        bids_values.reverse()
+        return bids_values
@@ -27,7 +27,7 @@ from typing import Dict, Optional
 from geniusweb.progress.ProgressRounds import ProgressRounds
 from geniusweb.bidspace.BidsWithUtility import BidsWithUtility
 from .extended_util_space_group_43 import ExtendedUtilSpace
-from .frequency_opponent_model_group_43 import FrequencyOpponentModel
+from .frequency_opponent_model_group_43 import MutableFrequencyOpponentModel
 from tudelft_utilities_logging.Reporter import Reporter
 
 
@@ -49,7 +49,7 @@ class Agent43(DefaultParty):
         # self._progress: Progress = None
         self._util_space : LinearAdditive = None
         self._extended_space: ExtendedUtilSpace = None
-        self._frequency_opponent_model : FrequencyOpponentModel = None
+        self._frequency_opponent_model : MutableFrequencyOpponentModel = None
         self._tracker = []
         # self._our_utilities = None
         self._number_of_potential_bids = 0
@@ -129,7 +129,7 @@ class Agent43(DefaultParty):
             opponent_model[issue] = for_issue
 
         # Init Frequency opponent model
-        self._frequency_opponent_model = FrequencyOpponentModel(self._profile.getProfile().getDomain(), opponent_model, 0, None)
+        self._frequency_opponent_model = MutableFrequencyOpponentModel(self._profile.getProfile().getDomain(), opponent_model, 0, None)
         # self._frequency_opponent_model = FrequencyOpponentModel.create().With(self._profile.getProfile().getDomain(), None)
 
         ### PREVIOUS IMPLEMENTATION ###
@@ -250,7 +250,8 @@ class Agent43(DefaultParty):
 
     # Update opponent model and derive some social welfare results
     def _updateOpponentModel(self, offer: Action):
-        self._frequency_opponent_model = FrequencyOpponentModel.WithAction(self._frequency_opponent_model, offer, self._progress)
+        # the model is updated in place
+        self._frequency_opponent_model.WithAction(offer, self._progress)
         self._last_received_utility = self.findUtility(self._last_received_bid)
         if self._progress.get(time.time() * 1000) > 0:
             area = Decimal(Context.multiply(Context(),
@@ -273,14 +274,13 @@ class Agent43(DefaultParty):
         percentile = Context.subtract(Context(), range_max, Context.multiply(Context(), Context.subtract(Context(), range_max, range_min), Decimal.from_float(0.1 + percentage)))
         range_of_bids = self._bids_with_util.getBids(Interval(percentile, range_max))
 
+        if self._progress.get(time.time() * 1000) < 0.5:
+            return range_of_bids.get(randint(0, range_of_bids.size() - 1))
+
         # Using opponent model, filter out those bids that will not be highly valued by opponent.
-        socialy_acceptably_bids = []
-        for b in range_of_bids:
-            if self._progress.get(time.time() * 1000) < 0.5:
-                return range_of_bids.get(randint(0, range_of_bids.size() - 1))
-            else:
-                if self._frequency_opponent_model.getUtility(b) >= 0.5:
-                    socialy_acceptably_bids.append(b)
+        bids = list(range_of_bids)
+        opponent_utilities = self._frequency_opponent_model.getUtilities(bids)
+        socialy_acceptably_bids = [b for b, u in zip(bids, opponent_utilities) if u >= 0.5]
 
         if len(socialy_acceptably_bids) < 1:
             return range_of_bids.get(randint(0, range_of_bids.size() - 1))
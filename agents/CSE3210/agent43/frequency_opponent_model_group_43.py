@@ -1,10 +1,11 @@
+import numpy as np
 from geniusweb.profile.utilityspace.UtilitySpace import UtilitySpace
 from geniusweb.opponentmodel.OpponentModel import OpponentModel
 from decimal import Decimal
 from decimal import Context
 from geniusweb.issuevalue.Domain import Domain
 from geniusweb.issuevalue.Bid import Bid
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 from geniusweb.issuevalue.Value import Value
 from geniusweb.actions.Action import Action
 from geniusweb.progress.Progress import Progress
@@ -218,4 +219,161 @@ class FrequencyOpponentModel(UtilitySpace, OpponentModel):
         else:
             for issue in dict:
                 dict[issue] = (dict[issue] / total_sum)
-        return dict
\ No newline at end of file
+        return dict
+
+
+class MutableFrequencyOpponentModel(FrequencyOpponentModel):
+    '''
+    Variant of the {@link FrequencyOpponentModel} that is updated in place.
+    Frequencies are kept in a float array per issue, so an offer costs one
+    vectorised update per issue instead of a copy of all frequencies and a new
+    model. The issue weights and weighted frequencies are cached until the next
+    offer, such that a utility costs a lookup per issue.
+    <p>
+    {@link #WithAction} updates this model and returns it, use
+    {@link #snapshot} to obtain an immutable {@link FrequencyOpponentModel}.
+    '''
+
+    def __init__(self, domain: Optional[Domain],
+                 freqs: Dict[str, Dict[Value, float]], total: int,
+                 resBid: Optional[Bid]):
+        super().__init__(domain, freqs, total, resBid)
+        self._issues = list(freqs.keys())
+        self._valueIndices: Dict[str, Dict[Value, int]] = {}
+        self._freqArrays: Dict[str, np.ndarray] = {}
+        # values that are in the frequency map, other values have frequency 0
+        self._present: Dict[str, np.ndarray] = {}
+        for issue in self._issues:
+            values = list(val(domain).getValues(issue)) if domain is not None else []
+            values += [v for v in freqs[issue] if v not in values]
+            self._valueIndices[issue] = {v: i for i, v in enumerate(values)}
+            self._freqArrays[issue] = np.array([freqs[issue].get(v, 0.0) for v in values], dtype=float)
+            self._present[issue] = np.array([v in freqs[issue] for v in values], dtype=bool)
+        self._weightedFreqs: Optional[Dict[str, np.ndarray]] = None
+
+    @staticmethod
+    def create() -> "MutableFrequencyOpponentModel":
+        return MutableFrequencyOpponentModel(None, {}, 0, None)
+
+    # Override
+    def With(self, newDomain: Domain, newResBid: Optional[Bid]) -> "MutableFrequencyOpponentModel":
+        if newDomain == None:
+            raise ValueError("domain is not initialized")
+        return MutableFrequencyOpponentModel(newDomain,
+                                             {iss: {} for iss in newDomain.getIssues()},
+                                             0, newResBid)
+
+    # Override
+    def WithAction(self, action: Action, progress: Progress) -> "MutableFrequencyOpponentModel":
+        if self._domain == None:
+            raise ValueError("domain is not initialized")
+
+        if not isinstance(action, Offer):
+            return self
+
+        # Same update as FrequencyOpponentModel.WithAction, on the arrays
+        bid: Bid = action.getBid()
+        avg_value = 0.5
+        for issue in self._issues:
+            value = bid.getValue(issue)
+            if value == None:
+                continue
+            freqs = self._freqArrays[issue]
+            present = self._present[issue]
+            values_in_issue = int(present.sum())
+            index = self._valueIndices[issue][value]
+            oldfreq = freqs[index] if present[index] else 0
+
+            freqs[present & (freqs == 0)] = avg_value
+            freqs[index] = min(oldfreq + 0.05, 1)
+            present[index] = True
+            freqs[present] *= values_in_issue * avg_value / freqs[present].sum()
+
+        self._totalBids += 1
+        self._weightedFreqs = None
+        return self
+
+    def snapshot(self) -> FrequencyOpponentModel:
+        '''
+        @return an immutable {@link FrequencyOpponentModel} with the current
+                frequencies.
+        '''
+        return FrequencyOpponentModel(self._domain, self._freqMap(), self._totalBids, self._resBid)
+
+    def _freqMap(self) -> Dict[str, Dict[Value, float]]:
+        return {issue: self.getCounts(issue) for issue in self._issues}
+
+    def getCounts(self, issue: str) -> Dict[Value, float]:
+        if self._domain == None:
+            raise ValueError("domain is not initialized")
+        if not issue in self._freqArrays:
+            return {}
+        freqs = self._freqArrays[issue]
+        present = self._present[issue]
+        return {v: float(freqs[i]) for v, i in self._valueIndices[issue].items() if present[i]}
+
+    def _getFraction(self, issue: str, value: Value) -> Decimal:
+        if self._totalBids == 0:
+            return Decimal(0.5)
+        index = self._valueIndices.get(issue, {}).get(value)
+        if index is None or not self._present[issue][index]:
+            return Decimal(0)
+        return Decimal(self._freqArrays[issue][index])
+
+    def getWeight(self):
+        max_freqs = {issue: float(self._freqArrays[issue].max(initial=0.0)) for issue in self._issues}
+        total_sum = sum(max_freqs.values())
+        if total_sum == 0:
+            return {issue: 0 for issue in max_freqs}
+        return {issue: max_freq / total_sum for issue, max_freq in max_freqs.items()}
+
+    def _getWeightedFreqs(self) -> Dict[str, np.ndarray]:
+        # weight times frequency of every value, recomputed after an offer
+        if self._weightedFreqs is None:
+            weights = self.getWeight()
+            self._weightedFreqs = {issue: weights[issue] * self._freqArrays[issue] for issue in self._issues}
+        return self._weightedFreqs
+
+    # Override
+    def getUtility(self, bid: Bid) -> Decimal:
+        if self._domain == None:
+            raise ValueError("domain is not initialized")
+        if self._totalBids == 0:
+            return Decimal(1)
+        weighted_freqs = self._getWeightedFreqs()
+        utility = 0.0
+        for issue in self._issues:
+            value = bid.getValue(issue)
+            if value is not None and value in self._valueIndices[issue]:
+                utility += weighted_freqs[issue][self._valueIndices[issue][value]]
+        return round(Decimal(utility), FrequencyOpponentModel._DECIMALS)
+
+    def getUtilities(self, bids: List[Bid]) -> np.ndarray:
+        '''
+        @param bids the bids to get the utility of
+        @return the utility of all bids as floats, rounded like {@link #getUtility}
+        '''
+        if self._domain == None:
+            raise ValueError("domain is not initialized")
+        if self._totalBids == 0:
+            return np.ones(len(bids))
+        weighted_freqs = self._getWeightedFreqs()
+        utilities = np.zeros(len(bids))
+        for issue in self._issues:
+            indices = self._valueIndices[issue]
+            # values that are not in the bid or not in the domain add nothing
+            lookup = np.append(weighted_freqs[issue], 0.0)
+            utilities += lookup[[indices.get(bid.getValue(issue), -1) for bid in bids]]
+        return np.round(utilities, FrequencyOpponentModel._DECIMALS)
+
+    # mutable, so compared by identity, compare snapshots to compare frequencies
+    __eq__ = object.__eq__
+    __hash__ = object.__hash__
+
+    # Override
+    def __repr__(self) -> str:
+        return "MutableFrequencyOpponentModel[" + str(self._totalBids) + "," + \
+               toStr(self._freqMap()) + "]"
+
+    def toString(self):
+        return f"MutableFrequencyOpponentModel({self._totalBids}, {self._freqMap()}"
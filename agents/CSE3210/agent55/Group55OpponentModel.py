@@ -1,9 +1,10 @@
+import numpy as np
 from geniusweb.profile.utilityspace.UtilitySpace import UtilitySpace
 from geniusweb.opponentmodel.OpponentModel import OpponentModel
 from decimal import Decimal
 from geniusweb.issuevalue.Domain import Domain
 from geniusweb.issuevalue.Bid import Bid
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 from geniusweb.issuevalue.Value import Value
 from geniusweb.actions.Action import Action
 from geniusweb.progress.Progress import Progress
@@ -236,3 +237,146 @@ class FrequencyOpponentModel(UtilitySpace, OpponentModel):
     def __repr__(self) -> str:
         return "FrequencyOpponentModel[" + str(self._totalBids) + "," + \
                toStr(self._bidFrequencies) + "]"
+
+
+class MutableFrequencyOpponentModel(FrequencyOpponentModel):
+    '''
+    Variant of the {@link FrequencyOpponentModel} that is updated in place.
+    Counts are kept in an integer array per issue, so an offer costs one
+    increment per issue instead of a copy of all frequencies and a new model.
+    The weighted fractions are cached until the next offer, such that a utility
+    costs a lookup per issue, and a batch of utilities costs one array lookup per
+    issue.
+    <p>
+    The issue weights are kept equal: {@link FrequencyOpponentModel#WithAction}
+    returns a model with fresh change counts, so its weights never leave their
+    equal defaults either.
+    <p>
+    {@link #WithAction} updates this model and returns it, use
+    {@link #snapshot} to obtain an immutable {@link FrequencyOpponentModel}.
+    '''
+
+    def __init__(self, domain: Optional[Domain],
+                 freqs: Dict[str, Dict[Value, int]],  total: int,
+                 resBid: Optional[Bid]):
+        super().__init__(domain, freqs, total, resBid)
+        self._issues = list(freqs.keys())
+        self._valueIndices: Dict[str, Dict[Value, int]] = {}
+        self._countArrays: Dict[str, np.ndarray] = {}
+        for issue in self._issues:
+            values = list(val(domain).getValues(issue)) if domain is not None else []
+            values += [v for v in freqs[issue] if v not in values]
+            self._valueIndices[issue] = {v: i for i, v in enumerate(values)}
+            self._countArrays[issue] = np.array([freqs[issue].get(v, 0) for v in values], dtype=np.int64)
+        self._weightedFractions: Optional[Dict[str, List[Decimal]]] = None
+
+    @staticmethod
+    def create() -> "MutableFrequencyOpponentModel":
+        return MutableFrequencyOpponentModel(None, {}, 0, None)
+
+    # Override
+    def With(self, newDomain: Domain,  newResBid: Optional[Bid]) -> "MutableFrequencyOpponentModel":
+        if newDomain == None:
+            raise ValueError("domain is not initialized")
+        return MutableFrequencyOpponentModel(newDomain,
+                                             {iss: {}
+                                                 for iss in newDomain.getIssues()},
+                                             0, newResBid)
+
+    # Override
+    def WithAction(self,  action: Action,  progress: Progress) -> "MutableFrequencyOpponentModel":
+        if self._domain == None:
+            raise ValueError("domain is not initialized")
+
+        if not isinstance(action, Offer):
+            return self
+
+        bid: Bid = action.getBid()
+        for issue in self._issues:
+            value = bid.getValue(issue)
+            if value != None:
+                self._countArrays[issue][self._valueIndices[issue][value]] += 1
+
+        self._totalBids += 1
+        self._weightedFractions = None
+        return self
+
+    def snapshot(self) -> FrequencyOpponentModel:
+        '''
+        @return an immutable {@link FrequencyOpponentModel} with the current
+                counts.
+        '''
+        return FrequencyOpponentModel(self._domain, self._freqMap(), self._totalBids, self._resBid)
+
+    def _freqMap(self) -> Dict[str, Dict[Value, int]]:
+        return {issue: self.getCounts(issue) for issue in self._issues}
+
+    def getCounts(self, issue: str) -> Dict[Value, int]:
+        if self._domain == None:
+            raise ValueError("domain is not initialized")
+        if not issue in self._countArrays:
+            return {}
+        counts = self._countArrays[issue]
+        return {v: int(counts[i]) for v, i in self._valueIndices[issue].items() if counts[i] > 0}
+
+    def _getFraction(self, issue: str, value: Value) -> Decimal:
+        if self._totalBids == 0:
+            return Decimal(1)
+        index = self._valueIndices.get(issue, {}).get(value)
+        if index is None or self._countArrays[issue][index] == 0:
+            return Decimal(0)
+        freq = int(self._countArrays[issue][index])
+        return round(Decimal(freq) / self._totalBids, FrequencyOpponentModel._DECIMALS)
+
+    def _getWeightedFractions(self) -> Dict[str, List[Decimal]]:
+        # weight times fraction of every value, recomputed after an offer. These
+        # stay Decimal, such that utilities are rounded exactly like the
+        # immutable model does
+        if self._weightedFractions is None:
+            self._weightedFractions = {
+                issue: [self._issueWeights[issue] * round(Decimal(int(count)) / self._totalBids,
+                                                          FrequencyOpponentModel._DECIMALS)
+                        for count in self._countArrays[issue]]
+                for issue in self._issues}
+        return self._weightedFractions
+
+    # Override
+    def getUtility(self, bid: Bid) -> Decimal:
+        if self._domain == None:
+            raise ValueError("domain is not initialized")
+        if self._totalBids == 0:
+            return Decimal(1)
+        weighted_fractions = self._getWeightedFractions()
+        sum = Decimal(0)
+        for issue in self._issues:
+            value = bid.getValue(issue)
+            if value is not None and value in self._valueIndices[issue]:
+                sum += weighted_fractions[issue][self._valueIndices[issue][value]]
+        return round(sum, FrequencyOpponentModel._DECIMALS)
+
+    def getUtilities(self, bids: List[Bid]) -> np.ndarray:
+        '''
+        @param bids the bids to get the utility of
+        @return the utility of all bids as floats, rounded like {@link #getUtility}
+        '''
+        if self._domain == None:
+            raise ValueError("domain is not initialized")
+        if self._totalBids == 0:
+            return np.ones(len(bids))
+        weighted_fractions = self._getWeightedFractions()
+        utilities = np.zeros(len(bids))
+        for issue in self._issues:
+            indices = self._valueIndices[issue]
+            # values that are not in the bid or not in the domain add nothing
+            lookup = np.array([float(f) for f in weighted_fractions[issue]] + [0.0])
+            utilities += lookup[[indices.get(bid.getValue(issue), -1) for bid in bids]]
+        return np.round(utilities, FrequencyOpponentModel._DECIMALS)
+
+    # mutable, so compared by identity, compare snapshots to compare counts
+    __eq__ = object.__eq__
+    __hash__ = object.__hash__
+
+    # Override
+    def __repr__(self) -> str:
+        return "MutableFrequencyOpponentModel[" + str(self._totalBids) + "," + \
+               toStr(self._freqMap()) + "]"
@@ -23,7 +23,7 @@ from geniusweb.progress.ProgressRounds import ProgressRounds
 from tudelft_utilities_logging.Reporter import Reporter
 import heapq
 from decimal import *
-from .Group55OpponentModel import FrequencyOpponentModel
+from .Group55OpponentModel import MutableFrequencyOpponentModel
 
 
 class Agent55(DefaultParty):
@@ -42,7 +42,7 @@ class Agent55(DefaultParty):
         """
         this will create the opponent model
         """
-        self.opponentModel = FrequencyOpponentModel.create()
+        self.opponentModel = MutableFrequencyOpponentModel.create()
 
         """
         baselineAcceptableUtility is a utility value for which we accept immediately
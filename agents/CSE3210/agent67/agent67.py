@@ -26,6 +26,8 @@ from geniusweb.profileconnection.ProfileConnectionFactory import (
 from geniusweb.progress.ProgressRounds import ProgressRounds
 from tudelft_utilities_logging.Reporter import Reporter
 
+from agents.template_agent.utils.bid_enumeration import best_bids
+
 
 
 class Agent67(DefaultParty):
@@ -363,20 +365,12 @@ class Agent67(DefaultParty):
         Returns the best bid
         """
         if(not self.calculated_bid):
-            domain = self._profile.getProfile().getDomain()
-            all_bids = AllBidsList(domain)
             profile = self._profile.getProfile()
 
-            best_utility = 0.0
-
-            for x in all_bids:
-                curr_utility = profile.getUtility(x)
-                if(best_utility < curr_utility):
-                    bid = x
-                    best_utility = curr_utility
+            # the first bid in descending utility order, without enumerating all bids
+            self.best_bid, _ = next(best_bids(profile))
 
             self.calculated_bid = True
-            self.best_bid = bid
 
             return self.best_bid
         else:
@@ -386,20 +380,14 @@ class Agent67(DefaultParty):
         """
         Sorting bids based on the utility values
         """
-        temp_tuple_bid = []
         if(not self.calculated_bid):
             domain = self._profile.getProfile().getDomain()
             all_bids = AllBidsList(domain)
             profile = self._profile.getProfile()
 
-            for x in all_bids:
-                temp_tuple_bid.append((profile.getUtility(x), x))
-
-            temp_tuple_bid = sorted(
-                temp_tuple_bid, key=lambda x: x[0], reverse=True)
-
+            # eagerly sorted, as find_best_offer may scan all bids on every turn
+            self.sorted_bid = sorted(all_bids, key=profile.getUtility, reverse=True)
             self.calculated_bid = True
-            self.sorted_bid = [bid[1] for bid in temp_tuple_bid]
 
     def map_issues_to_numeric_and_initialize(self, issue):
         """
@@ -1,3 +1,5 @@
+from heapq import heapreplace
+from itertools import islice
 from multiprocessing import Value
 
 from geniusweb.opponentmodel.FrequencyOpponentModel import FrequencyOpponentModel
@@ -38,7 +40,9 @@ class Bidding():
         self._opp_utility = None
         self._bids_to_make_stack: [Bid] = []
         self._resBidValue = Decimal('0.0')
+        # min-heap of the 5 best scores of the received bids, with their running sum
         self._recentBidScore = [Decimal('0.0') for _ in range(5)]
+        self._recentBidScoreSum = Decimal('0.0')
         self._utilW = 0.75
         self._leniencyW = 0.25
         self._leniencyBase = 0.35
@@ -85,14 +89,14 @@ class Bidding():
         return self._e
 
     def receivedBid(self, bid: Bid):
-        self._recentBidScore.sort()
-
         profile = cast(LinearAdditive, self._profileint.getProfile())
 
         bidUtility = profile.getUtility(bid)
 
+        # replace the lowest score, the root of the heap
         if (self._recentBidScore[0] < bidUtility):
-            self._recentBidScore[0] = bidUtility
+            replaced = heapreplace(self._recentBidScore, bidUtility)
+            self._recentBidScoreSum += bidUtility - replaced
 
         self.updateBestBackupBid(bid, bidUtility)
 
@@ -105,7 +109,7 @@ class Bidding():
         Returns:
             _type_: _description_
         """
-        avgRecentBids = float(sum(self._recentBidScore) / len(self._recentBidScore))
+        avgRecentBids = float(self._recentBidScoreSum / len(self._recentBidScore))
 
         return np.clip((1 - avgRecentBids) + self._leniencyBase, 0, 1)
 
@@ -206,21 +210,19 @@ class Bidding():
                 return outBid
 
             # filter based on the frequencies found above
-            filtered = list(filter(lambda bid: bid._issuevalues[max_issue] == max_value, options))
+            # only the first 10 matching bids are considered, so stop filtering there
+            filtered = list(islice(filter(lambda bid: bid._issuevalues[max_issue] == max_value, options), 10))
             top = []
             if len(filtered) == 0 or self._progress.get(round(clock() * 1000)) < 0.25:
-                util_predictor = lambda bid: opponent.getUtility(bid)
-
-                top = sorted(self._joinedSubList(options, 0, min(10, options.size())), key=util_predictor, reverse=True)
+                top = self._topOpponentUtility(
+                    self._joinedSubList(options, 0, min(10, options.size())), opponent.getUtility, 1)
                 # if top[0] is smaller than best bid so far
                 if profile.getUtility(self._best_backup_bid) >= profile.getUtility(top[0]):
                     self._bids_to_make_stack.append(self._best_backup_bid)
                 else:
                     self._bids_to_make_stack.append(top[0])
             else:
-                top = filtered[:min(10, len(filtered))]
-                util_predictor = lambda bid: opponent.getUtility(bid)
-                top = sorted(top, key=util_predictor, reverse=True)
+                top = self._topOpponentUtility(filtered, opponent.getUtility, 2)
 
                 # Proposing the bid from the opponent with the best utility so far
                 if len(top) >= 2:
@@ -232,10 +234,34 @@ class Bidding():
         return self._bids_to_make_stack.pop()
 
     def _pickBestOpponentUtility(self, bidlist: ImmutableList[Bid]) -> List[Bid]:
+        return self._topOpponentUtility(list(bidlist), self._opp_utility, 2)
 
-        outBids: List[Bid] = sorted(bidlist, key=self._opp_utility, reverse=True)
+    def _topOpponentUtility(self, bids: List[Bid], oppUtility, k: int) -> List[Bid]:
+        """Selects the k bids with the highest estimated opponent utility, without sorting all bids.
+
+        Args:
+            bids (List[Bid]): bids to select from
+            oppUtility: estimated opponent utility function
+            k (int): number of bids to select
 
-        return outBids[0:2]
+        Returns:
+            List[Bid]: the selected bids sorted on descending opponent utility, bids with equal
+                utility in the order of the input (like a stable sort)
+        """
+        if k <= 0 or len(bids) == 0:
+            return []
+        utilities = np.array([float(oppUtility(bid)) for bid in bids])
+        if k < len(bids):
+            # utility of the k-th best bid, all better bids and the first equal ones are selected
+            kth = -np.partition(-utilities, k - 1)[k - 1]
+            better = np.flatnonzero(utilities > kth)
+            equal = np.flatnonzero(utilities == kth)[:k - len(better)]
+            selected = np.concatenate((better, equal))
+        else:
+            selected = np.arange(len(bids))
+        # stable sort of the k selected bids on descending utility
+        selected = selected[np.lexsort((selected, -utilities[selected]))]
+        return [bids[i] for i in selected]
 
     def _getUtilityGoal(
             self, t: float, e: float, minUtil: Decimal, maxUtil: Decimal
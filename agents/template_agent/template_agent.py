@@ -1,5 +1,4 @@
 import logging
-from random import randint
 from time import time
 from typing import cast
 
@@ -7,7 +6,6 @@ from geniusweb.actions.Accept import Accept
 from geniusweb.actions.Action import Action
 from geniusweb.actions.Offer import Offer
 from geniusweb.actions.PartyId import PartyId
-from geniusweb.bidspace.AllBidsList import AllBidsList
 from geniusweb.inform.ActionDone import ActionDone
 from geniusweb.inform.Finished import Finished
 from geniusweb.inform.Inform import Inform
@@ -27,8 +25,13 @@ from geniusweb.progress.ProgressTime import ProgressTime
 from geniusweb.references.Parameters import Parameters
 from tudelft_utilities_logging.ReportToLogger import ReportToLogger
 
+from .utils.bid_sampling import ThresholdBidSampler
 from .utils.opponent_model import OpponentModel
 
+# utility above which an offer of the opponent is accepted near the deadline, we do not offer
+# bids below it either
+ACCEPTANCE_UTILITY = 0.8
+
 
 class TemplateAgent(DefaultParty):
     """
@@ -50,6 +53,7 @@ class TemplateAgent(DefaultParty):
 
         self.last_received_bid: Bid = None
         self.opponent_model: OpponentModel = None
+        self.bid_sampler: ThresholdBidSampler = None
         self.logger.log(logging.INFO, "party is initialized")
 
     def notifyChange(self, data: Inform):
@@ -81,6 +85,9 @@ class TemplateAgent(DefaultParty):
             self.domain = self.profile.getDomain()
             profile_connection.close()
 
+            # draws random bids above a utility threshold, without enumerating all bids
+            self.bid_sampler = ThresholdBidSampler(self.profile)
+
         # ActionDone informs you of an action (an offer or an accept)
         # that is performed by one of the agents (including yourself).
         elif isinstance(data, ActionDone):
@@ -168,7 +175,7 @@ class TemplateAgent(DefaultParty):
             action = Accept(self.me, self.last_received_bid)
         else:
             # if not, find a bid to propose as counter offer
-            bid = self.find_bid()
+            bid = self.find_bid(ACCEPTANCE_UTILITY)
             action = Offer(self.me, bid)
 
         # send the action
@@ -194,29 +201,40 @@ class TemplateAgent(DefaultParty):
         # progress of the negotiation session between 0 and 1 (1 is deadline)
         progress = self.progress.get(time() * 1000)
 
-        # very basic approach that accepts if the offer is valued above 0.7 and
+        # very basic approach that accepts if the offer is valued above 0.8 and
         # 95% of the time towards the deadline has passed
         conditions = [
-            self.profile.getUtility(bid) > 0.8,
+            self.profile.getUtility(bid) > ACCEPTANCE_UTILITY,
             progress > 0.95,
         ]
         return all(conditions)
 
-    def find_bid(self) -> Bid:
-        # compose a list of all possible bids
-        domain = self.profile.getDomain()
-        all_bids = AllBidsList(domain)
+    def find_bid(self, min_utility: float = 0.0) -> Bid:
+        """Find a bid according to a heuristic score
+
+        Args:
+            min_utility (float, optional): only consider bids with at least this utility for
+                us. Defaults to 0.0.
 
+        Returns:
+            Bid: bid with the best score of 500 random bids above `min_utility`, or of any
+                utility if no bid reaches `min_utility`
+        """
         best_bid_score = 0.0
         best_bid = None
 
         # take 500 attempts to find a bid according to a heuristic score
         for _ in range(500):
-            bid = all_bids.get(randint(0, all_bids.size() - 1))
+            bid = self.bid_sampler.sample(min_utility)
+            if bid is None:
+                # no bid reaches the minimum utility
+                break
             bid_score = self.score_bid(bid)
             if bid_score > best_bid_score:
                 best_bid_score, best_bid = bid_score, bid
 
+        if best_bid is None and min_utility > 0.0:
+            return self.find_bid()
         return best_bid
 
     def score_bid(self, bid: Bid, alpha: float = 0.95, eps: float = 0.1) -> float:
@@ -0,0 +1,107 @@
+from decimal import Decimal
+from heapq import heappop, heappush
+from typing import Iterator, List, Tuple
+
+from geniusweb.issuevalue.Bid import Bid
+from geniusweb.issuevalue.Value import Value
+from geniusweb.profile.utilityspace.LinearAdditive import LinearAdditive
+
+
+def get_issue_contributions(
+    profile: LinearAdditive,
+) -> Tuple[List[str], List[List[Tuple[Decimal, Value]]]]:
+    """Contribution (weight times value utility) of every value to the utility of a bid, per
+    issue and sorted on descending contribution. The utility of a bid is the sum of the
+    contributions of its values.
+    """
+    domain = profile.getDomain()
+    weights = profile.getWeights()
+    utilities = profile.getUtilities()
+    issues = sorted(domain.getIssues())
+    contributions = [
+        sorted(
+            [
+                (weights[issue] * utilities[issue].getUtility(value), value)
+                for value in domain.getValues(issue)
+            ],
+            key=lambda x: x[0],
+            reverse=True,
+        )
+        for issue in issues
+    ]
+    return issues, contributions
+
+
+def best_bids(profile: LinearAdditive) -> Iterator[Tuple[Bid, Decimal]]:
+    """Lazily yield all bids of a linear additive profile with their utility, in descending
+    order of utility, without enumerating the bid space.
+
+    A bid is represented by the rank of its value in every issue (see
+    `get_issue_contributions`), the best bid has rank 0 for all issues. The successors of a
+    bid lower the rank of a single issue, and are only generated for issues at or after the
+    last lowered issue, such that every bid is generated exactly once. A priority queue on
+    utility hands out the next best bid, which costs O(issues * log k) for the k-th bid.
+    """
+    issues, contributions = get_issue_contributions(profile)
+    if any(len(values) == 0 for values in contributions):
+        return
+
+    start = (0,) * len(issues)
+    # the rank tuple breaks ties between bids with equal utility deterministically
+    queue = [(-sum(values[0][0] for values in contributions), start, 0)]
+    while queue:
+        negative_utility, ranks, first_issue = heappop(queue)
+        for i in range(first_issue, len(issues)):
+            rank = ranks[i]
+            if rank + 1 < len(contributions[i]):
+                successor = ranks[:i] + (rank + 1,) + ranks[i + 1:]
+                # only the contribution of issue i changes
+                successor_utility = (
+                    -negative_utility - contributions[i][rank][0] + contributions[i][rank + 1][0]
+                )
+                heappush(queue, (-successor_utility, successor, i))
+
+        bid = Bid({issue: contributions[i][ranks[i]][1] for i, issue in enumerate(issues)})
+        yield bid, -negative_utility
+
+
+class SortedBids:
+    """Read-only list of all bids of a linear additive profile, sorted on descending utility.
+    Bids are only generated (by `best_bids`) as far as the list is accessed, so an agent that
+    only uses its top bids does not enumerate the rest of the bid space.
+    """
+
+    def __init__(self, profile: LinearAdditive):
+        domain = profile.getDomain()
+        self._size = 1
+        for issue in domain.getIssues():
+            self._size *= domain.getValues(issue).size()
+        self._iterator = best_bids(profile)
+        self._bids: List[Bid] = []
+        self._utilities: List[Decimal] = []
+
+    def _generate(self, index: int):
+        while len(self._bids) <= index:
+            bid, utility = next(self._iterator)
+            self._bids.append(bid)
+            self._utilities.append(utility)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, index: int) -> Bid:
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("bid index out of range")
+        self._generate(index)
+        return self._bids[index]
+
+    def __iter__(self) -> Iterator[Bid]:
+        for index in range(self._size):
+            yield self[index]
+
+    def get_utility(self, index: int) -> Decimal:
+        """Utility of the bid at `index`, without recomputing it."""
+        self._generate(index)
+        return self._utilities[index]
@@ -0,0 +1,121 @@
+from math import floor
+from random import Random, getrandbits
+from typing import List, Optional
+
+import numpy as np
+from geniusweb.issuevalue.Bid import Bid
+from geniusweb.issuevalue.Value import Value
+from geniusweb.profile.utilityspace.LinearAdditive import LinearAdditive
+
+# utilities are discretised to steps of 1 / RESOLUTION in the counting tables
+RESOLUTION = 1000
+# rejected samples before falling back to the best bid, only reached if a threshold is so close
+# to the maximum utility that nearly all bids within the discretisation error are below it
+MAX_REJECTIONS = 1000
+
+
+class ThresholdBidSampler:
+    """Draws bids of a linear additive profile uniformly at random from all bids with a utility
+    of at least a threshold, without enumerating the bid space.
+
+    The contribution (weight times value utility) of every value is rounded down to an integer
+    number of steps of 1 / `resolution`. Per issue, a table counts the completions of the
+    remaining issues that reach at least a given number of steps, so a bid is built issue by
+    issue by picking every value with a probability proportional to its number of completions
+    above the threshold. As rounding down loses less than one step per issue, the tables
+    overcount by the bids within `num_issues` steps below the threshold, those are rejected
+    by their exact utility, such that the accepted bids are exactly uniform.
+
+    Setup takes O(values * resolution) time and memory, a sample takes O(values).
+
+    Without a `random` generator, the sampler seeds its own generator from the global one, such
+    that sessions that seed the `random` module stay reproducible.
+    """
+
+    def __init__(
+        self, profile: LinearAdditive, resolution: int = RESOLUTION, random: Random = None
+    ):
+        domain = profile.getDomain()
+        weights = profile.getWeights()
+        utilities = profile.getUtilities()
+
+        self._random = random or Random(getrandbits(64))
+        self._resolution = resolution
+        self._issues = sorted(domain.getIssues())
+        self._values: List[List[Value]] = [list(domain.getValues(i)) for i in self._issues]
+        self._contributions: List[List[float]] = [
+            [float(weights[issue] * utilities[issue].getUtility(v)) for v in values]
+            for issue, values in zip(self._issues, self._values)
+        ]
+        self._steps: List[np.ndarray] = [
+            np.array([floor(c * resolution) for c in contributions], dtype=np.int64)
+            for contributions in self._contributions
+        ]
+        self._max_utility = sum(max(c) for c in self._contributions if c)
+        self._best_bid = None
+        if all(self._values):
+            self._best_bid = Bid(
+                {
+                    issue: values[int(np.argmax(contributions))]
+                    for issue, values, contributions in zip(
+                        self._issues, self._values, self._contributions
+                    )
+                }
+            )
+
+        # exact[i][s]: number of completions of issues i.. that add up to exactly s steps
+        max_steps = int(sum(s.max() for s in self._steps if len(s)))
+        exact = np.zeros(max_steps + 1, dtype=np.float64)
+        exact[0] = 1.0
+        # at_least[i][s]: number of completions of issues i.. with at least s steps
+        self._at_least: List[np.ndarray] = [None] * (len(self._issues) + 1)
+        self._at_least[-1] = exact[::-1].cumsum()[::-1]
+        for i in reversed(range(len(self._issues))):
+            shifted = np.zeros_like(exact)
+            for step in self._steps[i]:
+                shifted[step:] += exact[: len(exact) - step]
+            exact = shifted
+            self._at_least[i] = exact[::-1].cumsum()[::-1]
+
+    def _completions(self, issue_index: int, steps: np.ndarray) -> np.ndarray:
+        """Number of completions of the issues from `issue_index` on with at least `steps`."""
+        at_least = self._at_least[issue_index]
+        return at_least[np.clip(steps, 0, len(at_least) - 1)] * (steps < len(at_least))
+
+    def count(self, threshold: float) -> float:
+        """Upper bound on the number of bids with a utility of at least `threshold`, it also
+        includes bids that are less than `num_issues / resolution` below the threshold.
+        """
+        return float(self._completions(0, np.array(self._min_steps(threshold))))
+
+    def _min_steps(self, threshold: float) -> int:
+        # a bid with utility >= threshold has more than threshold * resolution - num_issues steps
+        return max(floor(threshold * self._resolution) - len(self._issues) + 1, 0)
+
+    def sample(self, threshold: float = 0.0) -> Optional[Bid]:
+        """Uniformly random bid with a utility of at least `threshold`.
+
+        Args:
+            threshold (float, optional): minimum utility of the bid. Defaults to 0.0.
+
+        Returns:
+            Optional[Bid]: the bid, None if no bid reaches the threshold.
+        """
+        if self._best_bid is None or threshold > self._max_utility:
+            return None
+
+        min_steps = self._min_steps(threshold)
+        for _ in range(MAX_REJECTIONS):
+            values = {}
+            utility = 0.0
+            remaining = min_steps
+            for i, issue in enumerate(self._issues):
+                weights = self._completions(i + 1, remaining - self._steps[i])
+                index = self._random.choices(range(len(weights)), weights=weights)[0]
+                values[issue] = self._values[i][index]
+                utility += self._contributions[i][index]
+                remaining -= int(self._steps[i][index])
+            # the float sum may be slightly off, so compare with a small tolerance
+            if utility >= threshold - 1e-12:
+                return Bid(values)
+        return self._best_bid
@@ -0,0 +1,75 @@
+import math
+from typing import List
+
+import numpy as np
+from geniusweb.issuevalue.Bid import Bid
+from geniusweb.issuevalue.Domain import Domain
+
+
+class ValueFrequencyModel:
+    """Frequency opponent model of the learning agent family. The value of a bid for the
+    opponent is the weighted average over the issues of how often the opponent offered the
+    value of the bid, relative to its most offered value (at least 1). Issues are weighted
+    by the inverse standard deviation of their value counts.
+
+    Counts are kept in an integer array per issue, indexed by value. The weighted value scores
+    are only recomputed after the opponent offered a new bid, so scoring a bid is a lookup per
+    issue and scoring many bids is an array lookup per issue.
+    """
+
+    def __init__(self, domain: Domain):
+        self.issues = list(domain.getIssues())
+        self.value_indices = [
+            {value: i for i, value in enumerate(domain.getValues(issue))} for issue in self.issues
+        ]
+        self.counts = [np.zeros(len(indices), dtype=np.int64) for indices in self.value_indices]
+        self._weighted_scores: List[np.ndarray] = None
+        self._sum_of_weights: float = None
+
+    def update(self, bid: Bid):
+        """Count the values of a bid offered by the opponent."""
+        if bid is None:
+            return
+        for issue, indices, counts in zip(self.issues, self.value_indices, self.counts):
+            counts[indices[bid.getValue(issue)]] += 1
+        self._weighted_scores = None
+
+    def _update_scores(self):
+        self._weighted_scores = []
+        self._sum_of_weights = 0.0
+        for counts in self.counts:
+            # estimated utility of the values of the issue
+            scores = counts / max(counts.max(initial=0), 1)
+            # inverse standard deviation of the counts
+            mean = counts.sum() / len(counts)
+            weight = 1.0 / math.sqrt((float(np.square(counts - mean).sum()) + 0.1) / len(counts))
+            self._weighted_scores.append(weight * scores)
+            self._sum_of_weights += weight
+
+    def get_indices(self, bids: List[Bid]) -> np.ndarray:
+        """Value index of every issue of every bid, an array of shape (len(bids), num_issues)."""
+        return np.array(
+            [[indices[bid.getValue(issue)] for issue, indices in zip(self.issues, self.value_indices)]
+             for bid in bids],
+            dtype=np.int64,
+        ).reshape(len(bids), len(self.issues))
+
+    def get_value(self, bid: Bid) -> float:
+        """Estimated value of a bid for the opponent, between 0 and 1."""
+        if self._weighted_scores is None:
+            self._update_scores()
+        value = 0.0
+        for issue, indices, scores in zip(self.issues, self.value_indices, self._weighted_scores):
+            value += scores[indices[bid.getValue(issue)]]
+        return value / self._sum_of_weights
+
+    def get_values(self, indices: np.ndarray) -> np.ndarray:
+        """Estimated value for the opponent of the bids with the given value indices (see
+        `get_indices`), e.g. a slice of the indices of a sorted bid list.
+        """
+        if self._weighted_scores is None:
+            self._update_scores()
+        value = np.zeros(len(indices))
+        for k, scores in enumerate(self._weighted_scores):
+            value += scores[indices[:, k]]
+        return value / self._sum_of_weights
@@ -68,6 +68,13 @@ class ExtendedUtilSpace:
     def getMax(self) -> Decimal:
         return self._maxUtil
 
+    def getTolerance(self) -> Decimal:
+        """
+        @return the width of the utility interval that is searched by
+                {@link #getBids}
+        """
+        return self._tolerance
+
     def getBids(self, utilityGoal: Decimal) -> ImmutableList[Bid]:
         """
         @param utilityGoal the requested utility
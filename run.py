@@ -15,6 +15,12 @@ if not RESULTS_DIR.exists():
 #   You need to specify the classpath of 2 agents to start a negotiation. Parameters for the agent can be added as a dict (see example)
 #   You need to specify the preference profiles for both agents. The first profile will be assigned to the first agent.
 #   You need to specify a time deadline (is milliseconds (ms)) we are allowed to negotiate before we end without agreement
+#   Alternatively, set "deadline_rounds" to end after a number of rounds, which makes results independent of machine load.
+#     The time deadline then only acts as a time limit (default 60000 ms).
+#   Optionally, set "runner" to "headless" to run sessions in-process without the geniusweb runner (faster).
+#     Set "runner" to "process" to run every agent in its own process, such that agents do not compete for CPU time.
+#   With a headless runner, set "clock" to "virtual" to measure the time deadline in CPU time used by the agents.
+#     Results then do not depend on how many sessions share the machine.
 settings = {
     "agents": [
         {
@@ -0,0 +1,73 @@
+import json
+import time
+from multiprocessing import freeze_support
+from pathlib import Path
+
+from utils.benchmark import compare_to_baseline, run_benchmark
+
+BASELINE_FILE = Path("benchmarks", "agent_baseline.json")
+
+if __name__ == "__main__":
+    freeze_support()
+
+    RESULTS_DIR = Path("results", time.strftime('%Y%m%d-%H%M%S'))
+    # create results directory if it does not exist
+    if not RESULTS_DIR.exists():
+        RESULTS_DIR.mkdir(parents=True)
+
+    # Settings to run a benchmark:
+    #   You need to specify the classpath of the agents to benchmark. Parameters for the agent can be added as a dict.
+    #   The agents are benchmarked on the first profile of every profile set and on randomly generated domains
+    #   of (approximately) the given sizes. Every agent receives `num_turns` random opponent offers.
+    #   Measurements that take longer than `timeout_s` seconds are aborted.
+    benchmark_settings = {
+        "agents": [
+            {
+                "class": "agents.template_agent.template_agent.TemplateAgent",
+            },
+            {
+                "class": "agents.boulware_agent.boulware_agent.BoulwareAgent",
+            },
+            {
+                "class": "agents.64_agent.64_agent.Agent_64",
+            },
+            {
+                "class": "agents.ANL2022.dreamteam109_agent.dreamteam109_agent.DreamTeam109Agent",
+            },
+            {
+                "class": "agents.CSE3210.agent2.agent2.Agent2",
+            },
+        ],
+        "profile_sets": [
+            ["domains/domain00/profileA.json", "domains/domain00/profileB.json"],
+            ["domains/domain01/profileA.json", "domains/domain01/profileB.json"],
+        ],
+        "generated_domain_sizes": [200, 1000, 10000, 100000],
+        "num_turns": 50,
+        "deadline_time_ms": 10000,
+        "timeout_s": 120,
+        "seed": 0,
+    }
+
+    benchmark_results = run_benchmark(benchmark_settings)
+
+    # save the benchmark results
+    with open(RESULTS_DIR.joinpath("benchmark_results.json"), "w", encoding="utf-8") as f:
+        f.write(json.dumps(benchmark_results, indent=2))
+
+    # compare against the baseline, or create the baseline if there is none yet
+    if BASELINE_FILE.exists():
+        with open(BASELINE_FILE, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(benchmark_results, baseline)
+        with open(RESULTS_DIR.joinpath("benchmark_regressions.json"), "w", encoding="utf-8") as f:
+            f.write(json.dumps(regressions, indent=2))
+        for regression in regressions:
+            print(
+                f"REGRESSION: {regression['agent']} on {regression['domain']}, {regression['metric']}: "
+                f"{regression['baseline']} -> {regression['current']}"
+            )
+    else:
+        BASELINE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        with open(BASELINE_FILE, "w", encoding="utf-8") as f:
+            f.write(json.dumps(benchmark_results, indent=2))
@@ -0,0 +1,62 @@
+import json
+import time
+from multiprocessing import freeze_support
+from pathlib import Path
+
+from utils.runners_adaptive import run_tournament
+
+if __name__ == '__main__':
+    freeze_support()
+
+    RESULTS_DIR = Path("results", time.strftime('%Y%m%d-%H%M%S'))
+    # create results directory if it does not exist
+    if not RESULTS_DIR.exists():
+        RESULTS_DIR.mkdir(parents=True)
+
+    # Settings to run an adaptive tournament:
+    #   The agents, profile sets and deadline are specified as in `run_tournament.py`.
+    #   Instead of running every permutation of agents on every profile set, sessions are sampled in batches
+    #   until the ranking of the agents on average utility is statistically separated.
+    #   "confidence" sets the confidence level of the separation, "tolerance" the utility difference
+    #   under which agents are considered tied and "max_sessions" an upper bound on the number of sessions.
+    tournament_settings = {
+        "agents": [
+            {
+                "class": "agents.boulware_agent.boulware_agent.BoulwareAgent",
+            },
+            {
+                "class": "agents.conceder_agent.conceder_agent.ConcederAgent",
+            },
+            {
+                "class": "agents.hardliner_agent.hardliner_agent.HardlinerAgent",
+            },
+            {
+                "class": "agents.linear_agent.linear_agent.LinearAgent",
+            },
+            {
+                "class": "agents.random_agent.random_agent.RandomAgent",
+            },
+        ],
+        "profile_sets": [
+            [f"domains/domain{i:02d}/profileA.json", f"domains/domain{i:02d}/profileB.json"]
+            for i in range(50)
+        ],
+        "deadline_time_ms": 10000,
+        "confidence": 0.95,
+        "tolerance": 0.01,
+        "max_sessions": None,
+        "seed": 0,
+        "parallel": True,
+    }
+
+    # run the tournament and obtain results in dictionaries
+    tournament_steps, tournament_results, tournament_results_summary = run_tournament(tournament_settings)
+
+    # save the tournament settings for reference
+    with open(RESULTS_DIR.joinpath("tournament_steps.json"), "w", encoding="utf-8") as f:
+        f.write(json.dumps(tournament_steps, indent=2))
+    # save the tournament results
+    with open(RESULTS_DIR.joinpath("tournament_results.json"), "w", encoding="utf-8") as f:
+        f.write(json.dumps(tournament_results, indent=2))
+    # save the tournament results summary
+    tournament_results_summary.to_csv(RESULTS_DIR.joinpath("tournament_results_summary.csv"))
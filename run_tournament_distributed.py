@@ -0,0 +1,71 @@
+import json
+import time
+from multiprocessing import freeze_support
+from pathlib import Path
+
+from utils.runners_distributed import run_tournament
+
+if __name__ == '__main__':
+    freeze_support()
+
+    RESULTS_DIR = Path("results", time.strftime('%Y%m%d-%H%M%S'))
+    # create results directory if it does not exist
+    if not RESULTS_DIR.exists():
+        RESULTS_DIR.mkdir(parents=True)
+
+    # Settings to run a distributed tournament:
+    #   The agents, profile sets and deadline are specified as in `run_tournament.py`.
+    #   Sessions are published to the work queue in the SQLite file "queue" and run by "local_workers" worker
+    #   processes on this machine. Workers on other machines that can reach the queue file (e.g. on a network share)
+    #   join with `python -m utils.runners_distributed <queue file> [<number of workers>]`.
+    #   Restarting an interrupted tournament with the same settings and queue resumes it.
+    #   Sessions that a worker did not report within "session_timeout_s" seconds are handed out again, sessions of a
+    #     local worker that died right away. A session that was handed out "max_attempts" times is reported as an error.
+    tournament_settings = {
+        "agents": [
+            {
+                "class": "agents.ANL2022.agent007.agent007.Agent007",
+            },
+            {
+                "class": "agents.ANL2022.compromising_agent.compromising_agent.CompromisingAgent",
+            },
+            {
+                "class": "agents.ANL2022.learning_agent.learning_agent.LearningAgent",
+            },
+            {
+                "class": "agents.ANL2022.super_agent.super_agent.SuperAgent",
+            },
+            {
+                "class": "agents.CSE3210.agent3.agent3.Agent3",
+            },
+            {
+                "class": "agents.CSE3210.agent33.agent33.Agent33",
+            },
+            {
+                "class": "agents.CSE3210.agent68.agent68.Agent68",
+            },
+        ],
+        "profile_sets": [
+            [f"domains/domain{i:02d}/profileA.json", f"domains/domain{i:02d}/profileB.json"]
+            for i in range(50)
+        ],
+        "deadline_time_ms": 10000,
+        "runner": "headless",
+        "queue": "results/tournament_queue.sqlite",
+        "local_workers": 4,
+        "session_timeout_s": 3600,
+        "max_attempts": 3,
+        "cache_dir": "results/session_cache",
+    }
+
+    # run the tournament and obtain results in dictionaries
+    tournament_steps, tournament_results, tournament_results_summary = run_tournament(tournament_settings)
+
+    # save the tournament settings for reference
+    with open(RESULTS_DIR.joinpath("tournament_steps.json"), "w", encoding="utf-8") as f:
+        f.write(json.dumps(tournament_steps, indent=2))
+    # save the tournament results
+    with open(RESULTS_DIR.joinpath("tournament_results.json"), "w", encoding="utf-8") as f:
+        f.write(json.dumps(tournament_results, indent=2))
+    # save the tournament results summary
+    tournament_results_summary.to_csv(RESULTS_DIR.joinpath("tournament_results_summary.csv"))
@@ -19,6 +19,22 @@ if __name__ == '__main__':
     #   You need to specify the classpath of 2 agents to start a negotiation. Parameters for the agent can be added as a dict (see example)
     #   You need to specify the preference profiles for both agents. The first profile will be assigned to the first agent.
     #   You need to specify a time deadline (is milliseconds (ms)) we are allowed to negotiate before we end without agreement.
+    #   Alternatively, set "deadline_rounds" to end after a number of rounds, which makes results independent of machine load.
+    #     The time deadline then only acts as a time limit (default 60000 ms).
+    #   Optionally, set "runner" to "headless" to run sessions in-process without the geniusweb runner (faster).
+    #     Set "runner" to "process" to run every agent in its own process, such that agents do not compete for CPU time.
+    #   With a headless runner, set "clock" to "virtual" to measure the time deadline in CPU time used by the agents.
+    #     Results then do not depend on how many sessions share the machine.
+    #   Optionally, set "cache_dir" to reuse the results of sessions of which the agents, profiles, deadline and "seed" did not change.
+    #   Optionally, set "memory_budget_mb" to abort sessions that use more memory (agents included) and to only start
+    #     new sessions when that amount of memory is available. The peak memory use is reported per session and agent.
+    #     The budget requires the "headless" or "process" runner, sessions of the geniusweb runner cannot be aborted.
+    #   Optionally, set "scheduling" to "benchmark" to run one session per physical core, pinned to that core, and
+    #     "headroom_cores" to leave a number of cores free. The wall time and CPU time of every session are reported.
+    #   The domain bundles (see `utils/domain_bundle.py`) of all domains are built once before the sessions start. The
+    #     workers memory-map them to process results, agents only use them if they opt in with `get_sorted_bids`
+    #     (e.g. super_agent and agent18), other agents still enumerate the bid space. Set "domain_bundles" to False to
+    #     skip this.
     tournament_settings = {
         "agents": [
             {
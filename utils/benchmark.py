@@ -0,0 +1,264 @@
+import random
+import shutil
+import tempfile
+import time
+from datetime import datetime
+from multiprocessing import Pool, TimeoutError
+from pathlib import Path
+from statistics import mean, median
+from typing import List, Optional
+
+from geniusweb.actions.Accept import Accept
+from geniusweb.actions.EndNegotiation import EndNegotiation
+from geniusweb.actions.Offer import Offer
+from geniusweb.actions.PartyId import PartyId
+from geniusweb.bidspace.AllBidsList import AllBidsList
+from geniusweb.inform.ActionDone import ActionDone
+from geniusweb.inform.Agreements import Agreements
+from geniusweb.inform.Finished import Finished
+from geniusweb.inform.Settings import Settings
+from geniusweb.inform.YourTurn import YourTurn
+from geniusweb.profileconnection.ProfileConnectionFactory import (
+    ProfileConnectionFactory,
+)
+from geniusweb.progress.ProgressTime import ProgressTime
+from geniusweb.references.Parameters import Parameters
+from geniusweb.references.ProfileRef import ProfileRef
+from geniusweb.references.ProtocolRef import ProtocolRef
+from geniusweb.simplerunner.NegoRunner import StdOutReporter
+from uri.uri import URI
+
+from utils.direct_connection import DirectConnection
+from utils.headless import load_agent_class
+from utils.memory import peak_rss_mb
+
+# metrics that are compared against the baseline, a higher value is worse for all of them
+BASELINE_METRICS = ["setup_time_s", "turn_time_mean_s", "turn_time_max_s", "peak_rss_mb"]
+
+
+def benchmark_agent(settings: dict) -> dict:
+    """Drive a single agent through a synthetic negotiation by calling `notifyChange` directly.
+    The agent receives a Settings object, followed by a stream of random opponent offers
+    that each precede a YourTurn. No protocol or runner is involved, so the measured times
+    only contain the cost of the agent itself.
+
+    Args:
+        settings (dict): agent dict ("class" and optional "parameters"), "profile" file path,
+            "num_turns", "deadline_time_ms" and "seed".
+
+    Returns:
+        dict: timings, peak memory use and result of the benchmark.
+    """
+    agent = settings["agent"]
+    profile = settings["profile"]
+    num_turns = settings["num_turns"]
+    deadline_time_ms = settings["deadline_time_ms"]
+    rng = random.Random(settings["seed"])
+
+    class_name = agent["class"].split(".")[-1]
+    me = PartyId(f"{class_name}_1")
+    opponent = PartyId("BenchmarkOpponent_2")
+
+    # load the domain only to be able to generate opponent offers
+    profile_uri = URI(f"file:{profile}")
+    profile_connection = ProfileConnectionFactory.create(profile_uri, StdOutReporter())
+    domain = profile_connection.getProfile().getDomain()
+    profile_connection.close()
+    all_bids = AllBidsList(domain)
+
+    results = {
+        "agent": class_name,
+        "class": agent["class"],
+        "domain": domain.getName(),
+        "domain_size": all_bids.size(),
+        "num_turns": 0,
+        "result": "ok",
+    }
+
+    # the agent gets its own storage directory to keep learned data out of the benchmark
+    storage_dir = tempfile.mkdtemp(prefix="benchmark_storage_")
+    parameters = dict(agent.get("parameters", {}))
+    parameters["storage_dir"] = storage_dir
+
+    try:
+        agent_class = load_agent_class(agent["class"])
+        results["base_rss_mb"] = peak_rss_mb()
+
+        connection = DirectConnection(me)
+        progress = ProgressTime(deadline_time_ms, datetime.now())
+        settings_inform = Settings(
+            me, ProfileRef(profile_uri), ProtocolRef(URI("SAOP")), progress, Parameters(parameters)
+        )
+
+        start = time.perf_counter()
+        party = agent_class()
+        party.connect(connection)
+        connection.inform(settings_inform)
+        results["setup_time_s"] = time.perf_counter() - start
+
+        turn_times = []
+        for _ in range(num_turns):
+            bid = all_bids.get(rng.randrange(all_bids.size()))
+
+            start = time.perf_counter()
+            connection.inform(ActionDone(Offer(opponent, bid)))
+            connection.inform(YourTurn())
+            actions = connection.pop_actions()
+            for action in actions:
+                connection.inform(ActionDone(action))
+            turn_times.append(time.perf_counter() - start)
+
+            if not actions:
+                raise ValueError("agent did not send an action on its turn")
+            if isinstance(actions[-1], (Accept, EndNegotiation)):
+                results["result"] = "accepted" if isinstance(actions[-1], Accept) else "ended"
+                break
+
+        start = time.perf_counter()
+        connection.inform(Finished(Agreements()))
+        results["finish_time_s"] = time.perf_counter() - start
+
+        results["num_turns"] = len(turn_times)
+        if turn_times:
+            results["turn_time_mean_s"] = mean(turn_times)
+            results["turn_time_median_s"] = median(turn_times)
+            results["turn_time_max_s"] = max(turn_times)
+    except Exception as e:
+        results["result"] = "ERROR"
+        results["error"] = repr(e)
+    finally:
+        shutil.rmtree(storage_dir, ignore_errors=True)
+
+    results["peak_rss_mb"] = peak_rss_mb()
+
+    return results
+
+
+def benchmark_agent_isolated(settings: dict, timeout_s: float) -> dict:
+    """Run `benchmark_agent` in a fresh process, such that imports and memory use of
+    previously benchmarked agents do not influence the measurement.
+    """
+    with Pool(1) as pool:
+        async_result = pool.apply_async(benchmark_agent, (settings,))
+        try:
+            return async_result.get(timeout_s)
+        except TimeoutError:
+            return {
+                "agent": settings["agent"]["class"].split(".")[-1],
+                "class": settings["agent"]["class"],
+                "domain": Path(settings["profile"]).parent.name,
+                "result": "timeout",
+            }
+
+
+def generate_domains(sizes: List[int], directory: str, seed: int = 0) -> List[list]:
+    """Generate random domains with (approximately) the requested number of bids.
+
+    Returns:
+        List[list]: profile sets of the generated domains.
+    """
+    # imported here as the domain generator is only needed for generated domains
+    import numpy as np
+
+    from utils.create_domains import Domain
+
+    random.seed(seed)
+    np.random.seed(seed)
+
+    profile_sets = []
+    for size in sizes:
+        domain = Domain.create_random(f"generated{size:06d}", size)
+        domain.to_file(directory)
+        domain_dir = Path(directory, domain.get_name())
+        profile_sets.append(
+            [str(domain_dir.joinpath("profileA.json")), str(domain_dir.joinpath("profileB.json"))]
+        )
+
+    return profile_sets
+
+
+def run_benchmark(benchmark_settings: dict) -> List[dict]:
+    agents = benchmark_settings["agents"]
+    profile_sets = list(benchmark_settings.get("profile_sets", []))
+    generated_domain_sizes = benchmark_settings.get("generated_domain_sizes", [])
+    num_turns = benchmark_settings.get("num_turns", 50)
+    deadline_time_ms = benchmark_settings.get("deadline_time_ms", 10000)
+    timeout_s = benchmark_settings.get("timeout_s", 120)
+    seed = benchmark_settings.get("seed", 0)
+
+    # quick and dirty checks
+    assert all(["class" in agent for agent in agents])
+    assert isinstance(num_turns, int) and num_turns > 0
+
+    generated_dir = tempfile.mkdtemp(prefix="benchmark_domains_")
+    try:
+        profile_sets += generate_domains(generated_domain_sizes, generated_dir, seed)
+
+        benchmark_results = []
+        for profiles in profile_sets:
+            for agent in agents:
+                settings = {
+                    "agent": agent,
+                    "profile": profiles[0],
+                    "num_turns": num_turns,
+                    "deadline_time_ms": deadline_time_ms,
+                    "seed": seed,
+                }
+                results = benchmark_agent_isolated(settings, timeout_s)
+                print(
+                    f"{results['agent']} on {results['domain']}: {results['result']}, "
+                    f"setup {results.get('setup_time_s', float('nan')):.4f}s, "
+                    f"turn {results.get('turn_time_mean_s', float('nan')):.4f}s"
+                )
+                benchmark_results.append(results)
+    finally:
+        shutil.rmtree(generated_dir, ignore_errors=True)
+
+    return benchmark_results
+
+
+def compare_to_baseline(
+    benchmark_results: List[dict], baseline: List[dict], tolerance: float = 2.0
+) -> List[dict]:
+    """Find the measurements that got worse than the baseline by more than a factor `tolerance`,
+    or that failed while the baseline measurement succeeded.
+
+    Returns:
+        List[dict]: one entry per regression with the agent, domain, metric and both values.
+    """
+    baseline_index = {(b["class"], b["domain"]): b for b in baseline}
+
+    regressions = []
+    for results in benchmark_results:
+        reference = baseline_index.get((results["class"], results["domain"]))
+        if reference is None:
+            continue
+
+        if results["result"] in ("ERROR", "timeout") and reference["result"] not in ("ERROR", "timeout"):
+            regressions.append(
+                {
+                    "agent": results["agent"],
+                    "domain": results["domain"],
+                    "metric": "result",
+                    "baseline": reference["result"],
+                    "current": results["result"],
+                }
+            )
+            continue
+
+        for metric in BASELINE_METRICS:
+            current, previous = results.get(metric), reference.get(metric)
+            if current is None or not previous:
+                continue
+            if current > previous * tolerance:
+                regressions.append(
+                    {
+                        "agent": results["agent"],
+                        "domain": results["domain"],
+                        "metric": metric,
+                        "baseline": previous,
+                        "current": current,
+                    }
+                )
+
+    return regressions
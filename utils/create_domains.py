@@ -3,16 +3,19 @@ import math
 import os
 from itertools import product
 from math import sqrt
-from random import randint
+from random import choice, randint
 from shutil import rmtree
 from string import ascii_uppercase
 from typing import Iterable
 
 import numpy as np
-import plotly.graph_objects as go
 from numpy.random import dirichlet
 
 NUM_DOMAINS_TO_GENERATE = 50
+# the distribution (average distance of bids to the Pareto front) and visualisation of larger
+# domains are based on a random sample of bids instead of the full bid space
+MAX_ENUMERATED_BIDS = 100000
+BID_SAMPLE_SIZE = 20000
 
 
 def main():
@@ -23,6 +26,30 @@ def main():
         domain.to_file("domains/")
 
 
+def pareto_indices(utilities: np.ndarray) -> np.ndarray:
+    """Indices of the Pareto optimal rows of a (num_bids, 2) utility matrix, sorted on the
+    first utility. Of bids with equal utilities, only the first one is kept.
+    """
+    # sort on utility A descending, then on utility B descending, then on bid index
+    order = np.lexsort((np.arange(len(utilities)), -utilities[:, 1], -utilities[:, 0]))
+    best_b = np.maximum.accumulate(utilities[order, 1])
+    # a bid is dominated if a bid with at least the utility A has at least its utility B
+    dominated = np.empty(len(order), dtype=bool)
+    dominated[0] = False
+    dominated[1:] = utilities[order[1:], 1] <= best_b[:-1]
+    return order[~dominated][::-1]
+
+
+def value_names(num_values: int) -> list:
+    """Value name suffixes A, B, ..., Z, AA, AB, ..., such that large domains can have more
+    than 26 values per issue.
+    """
+    names = []
+    for length in range(1, 3):
+        names.extend("".join(letters) for letters in product(ascii_uppercase, repeat=length))
+    return names[:num_values]
+
+
 class Profile:
     def __init__(self, profile, issue_weights, value_weights):
         self.profile = profile
@@ -48,6 +75,29 @@ class Profile:
 
         return cls(profile, issue_weights, value_weights)
 
+    @classmethod
+    def from_bundle(cls, bundle, profile, domain_name):
+        """Profile `profile` (0 for profile A, 1 for profile B) of a domain bundle, without
+        parsing the profile file.
+        """
+        # imported here, domain_bundle imports this module
+        from utils.domain_bundle import bundle_profile
+
+        issues_values, issue_weights, value_weights = bundle_profile(bundle, profile)
+        issue_utilities = {
+            i: {"DiscreteValueSetUtilities": {"valueUtilities": value_weights[i]}}
+            for i in issues_values
+        }
+        profile_dict = {
+            "LinearAdditiveUtilitySpace": {
+                "issueUtilities": issue_utilities,
+                "issueWeights": issue_weights,
+                "domain": {"name": domain_name, "issuesValues": issues_values},
+                "name": os.path.splitext(str(bundle["profiles"][profile]))[0],
+            }
+        }
+        return cls(profile_dict, issue_weights, value_weights)
+
     @classmethod
     def create_random(cls, domain, name):
         def dirichlet_dist(names, mode, alpha=1):
@@ -130,8 +180,9 @@ class Domain:
         self.visualisation = visualisation
 
     @classmethod
-    def create_random(cls, name):
-        domain_size = randint(200, 10000)
+    def create_random(cls, name, domain_size=None):
+        if domain_size is None:
+            domain_size = randint(200, 10000)
 
         while True:
             num_issues = randint(4, 10)
@@ -145,7 +196,7 @@ class Domain:
 
         issuesValues = {}
         for issue, num_values in zip(issues, values_per_issue):
-            values = {"values": [f"value{x}" for x in ascii_uppercase[:num_values]]}
+            values = {"values": [f"value{x}" for x in value_names(num_values)]}
             issuesValues[f"issue{issue}"] = values
 
         domain = {"name": name, "issuesValues": issuesValues}
@@ -156,8 +207,16 @@ class Domain:
     @classmethod
     def from_directory(cls, directory):
         name = os.path.basename(directory)
-        profile_B = Profile.from_file(f"{directory}/profileB.json")
-        profile_A = Profile.from_file(f"{directory}/profileA.json")
+        # imported here, domain_bundle imports this module
+        from utils.domain_bundle import is_bundle_current, load_bundle_cached
+
+        if os.path.exists(f"{directory}/domain.npz") and is_bundle_current(directory):
+            bundle = load_bundle_cached(os.path.abspath(directory))
+            profile_A = Profile.from_bundle(bundle, 0, name)
+            profile_B = Profile.from_bundle(bundle, 1, name)
+        else:
+            profile_B = Profile.from_file(f"{directory}/profileB.json")
+            profile_A = Profile.from_file(f"{directory}/profileA.json")
         domain = {"name": name, "issuesValues": profile_A.get_issues_values()}
 
         specials_path = f"{directory}/specials.json"
@@ -182,8 +241,8 @@ class Domain:
     def calculate_specials(self):
         if self.nash_bid:
             return False
-        self.pareto_front = self.get_pareto(list(self.iter_bids()))
-        self.distribution = self.get_distribution(self.iter_bids())
+        self.pareto_front = self.get_pareto_additive()
+        self.distribution = self.get_distribution(self.iter_bids_or_sample())
 
         SW_utility = 0
         nash_utility = 0
@@ -210,7 +269,10 @@ class Domain:
         return True
 
     def generate_visualisation(self):
-        bid_utils = [self.get_utilities(bid) for bid in self.iter_bids()]
+        # plotly is imported here, as it is slow to import and only needed for visualisations
+        import plotly.graph_objects as go
+
+        bid_utils = [self.get_utilities(bid) for bid in self.iter_bids_or_sample()]
         bid_utils = list(zip(*bid_utils))
 
         fig = go.Figure()
@@ -268,7 +330,7 @@ class Domain:
 
         fig.update_layout(
             title=dict(
-                text=f"{self.get_name()}<br><sub>(size: {len(list(self.iter_bids()))}, opposition: {self.opposition:.4f}, distribution: {self.distribution:.4f})</sub>",
+                text=f"{self.get_name()}<br><sub>(size: {self.get_size()}, opposition: {self.opposition:.4f}, distribution: {self.distribution:.4f})</sub>",
                 x=0.5,
                 xanchor="center",
             )
@@ -292,7 +354,7 @@ class Domain:
                 f.write(
                     json.dumps(
                         {
-                            "size": len(list(self.iter_bids())),
+                            "size": self.get_size(),
                             "opposition": self.opposition,
                             "distribution": self.distribution,
                             "social_welfare": self.SW_bid,
@@ -312,6 +374,19 @@ class Domain:
     def iter_bids(self) -> Iterable:
         return iter(self)
 
+    def get_size(self) -> int:
+        return math.prod(len(v["values"]) for v in self.domain["issuesValues"].values())
+
+    def iter_bids_or_sample(self) -> Iterable:
+        """All bids, or a random sample of bids if the domain is too large to enumerate."""
+        if self.get_size() <= MAX_ENUMERATED_BIDS:
+            return self.iter_bids()
+        issues_values = [(i, v["values"]) for i, v in self.domain["issuesValues"].items()]
+        return (
+            {issue: choice(values) for issue, values in issues_values}
+            for _ in range(BID_SAMPLE_SIZE)
+        )
+
     def get_utilities(self, bid):
         return self.profile_A.get_utility(bid), self.profile_B.get_utility(bid)
 
@@ -354,6 +429,54 @@ class Domain:
 
         return pareto_front
 
+    def get_pareto_additive(self) -> list:
+        """Exact Pareto front without enumerating the bid space, by exploiting that the
+        utility of a bid is the sum of the utilities of its values for both profiles.
+
+        A partial bid (values for the first issues) that is dominated by another partial bid
+        can never be part of a Pareto optimal bid, as replacing it by the dominating partial
+        bid gives a bid that is at least as good for both profiles. So the issues are added
+        one by one, combining every partial bid on the front with every value of the next
+        issue and pruning the dominated combinations. Memory use is bounded by the size of
+        the front times the number of values of an issue.
+
+        Returns:
+            list: Pareto front in the format of `get_pareto`, sorted on utility A
+        """
+        issues = list(self.domain["issuesValues"].keys())
+        values = [self.domain["issuesValues"][issue]["values"] for issue in issues]
+
+        # partial bids as value indices with their partial utilities for both profiles
+        choices = np.zeros((1, 0), dtype=np.int32)
+        utilities = np.zeros((1, 2))
+        for issue, issue_values in zip(issues, values):
+            value_utilities = np.array(
+                [
+                    [
+                        profile.issue_weights[issue] * profile.value_weights[issue][value]
+                        for profile in (self.profile_A, self.profile_B)
+                    ]
+                    for value in issue_values
+                ]
+            )
+            # combine every partial bid with every value of this issue
+            utilities = (utilities[:, None, :] + value_utilities[None, :, :]).reshape(-1, 2)
+            choices = np.concatenate(
+                [
+                    np.repeat(choices, len(issue_values), axis=0),
+                    np.tile(np.arange(len(issue_values)), len(choices))[:, None],
+                ],
+                axis=1,
+            )
+            front = pareto_indices(utilities)
+            choices, utilities = choices[front], utilities[front]
+
+        pareto_front = []
+        for bid_choices in choices:
+            bid = {issue: values[i][j] for i, (issue, j) in enumerate(zip(issues, bid_choices))}
+            pareto_front.append({"bid": bid, "utility": list(self.get_utilities(bid))})
+        return sorted(pareto_front, key=lambda d: d["utility"][0])
+
     def get_distribution(self, bids_iter) -> float:
         min_distance_sum = 0.0
 
@@ -379,10 +502,10 @@ class Domain:
         if not self.pareto_front:
             raise ValueError("Pareto front not calculated")
 
+        utilities = self.get_utilities(bid)
         min_distance = 5.0
         for pareto_element in self.pareto_front:
-            pareto_bid = pareto_element["bid"]
-            distance = self.distance(pareto_bid, bid)
+            distance = math.dist(pareto_element["utility"], utilities)
             if distance < min_distance:
                 min_distance = distance
 
@@ -0,0 +1,70 @@
+from typing import List, Optional
+
+from geniusweb.actions.Action import Action
+from geniusweb.inform.Inform import Inform
+
+
+class DirectConnection:
+    """Connection end that can be handed to a geniusweb party through `connect`.
+    Informs are delivered to the party by a direct method call and the actions that the
+    party sends are collected, so no threads, sockets or reporters are involved.
+    """
+
+    def __init__(self, reference=None, clock=None):
+        self._reference = reference
+        self._clock = clock
+        self._listeners = []
+        self._actions: List[Action] = []
+        self._error: Optional[Exception] = None
+        self._closed = False
+
+    def addListener(self, listener):
+        self._listeners.append(listener)
+
+    def removeListener(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def inform(self, data: Inform, timeout: Optional[float] = None):
+        """Deliver an inform to all listeners (usually the connected party).
+
+        Args:
+            data (Inform): Settings, ActionDone, YourTurn or Finished object.
+            timeout (Optional[float], optional): only present for compatibility with
+                `ProcessConnection`, a party in the same thread cannot be interrupted.
+        """
+        if self._clock is None:
+            self._notify(data)
+        else:
+            # the time the party spends on the inform advances the virtual clock
+            with self._clock.measure():
+                self._notify(data)
+
+    def _notify(self, data: Inform):
+        for listener in list(self._listeners):
+            listener.notifyChange(data)
+
+    def send(self, data: Action):
+        if self._closed:
+            raise IOError("connection is closed")
+        self._actions.append(data)
+
+    def pop_actions(self) -> List[Action]:
+        """Return the actions that were sent since the previous call and clear them."""
+        actions, self._actions = self._actions, []
+        return actions
+
+    def getReference(self):
+        return self._reference
+
+    def getRemoteURI(self):
+        return None
+
+    def getError(self) -> Optional[Exception]:
+        return self._error
+
+    def close(self):
+        self._closed = True
+
+    def is_closed(self) -> bool:
+        return self._closed
@@ -0,0 +1,309 @@
+"""Precompiled binary domain bundles (`domain.npz`) that are stored next to the profiles of a
+domain. A bundle contains the bid space of the domain and both profiles as arrays, such that
+analyses and agents do not have to parse the JSON profiles and enumerate the bid space:
+
+    issues              (num_issues,) issue names
+    values              (num_issues, max_values) value names, padded with ""
+    num_values          (num_issues,) number of values per issue
+    profiles            (2,) file names of profile A and B
+    issue_weights       (2, num_issues) issue weights of profile A and B
+    value_utilities     (2, num_issues, max_values) value utilities of profile A and B
+    bids                (num_bids, num_issues) value indices of all bids, in the order of
+                        `itertools.product` (the last issue changes fastest)
+    utilities           (num_bids, 2) utility of every bid for profile A and B
+    order               (2, num_bids) bid indices sorted on descending utility of profile A and B
+    pareto              indices of the Pareto optimal bids, sorted on the utility of profile A
+    nash, kalai, social_welfare  index of the Nash, Kalai-Smorodinsky and social welfare bid
+
+The bundle is an uncompressed zip of .npy files, so the arrays can be memory-mapped directly
+from the file, which makes loading instant and shares the memory between processes: all
+workers of a parallel tournament read the same pages from the page cache.
+Build the bundles of all domains with `python -m utils.domain_bundle [<domains directory>]`.
+"""
+import json
+import os
+import struct
+import sys
+import tempfile
+import zipfile
+from functools import lru_cache
+from itertools import product
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+
+from utils.create_domains import pareto_indices
+
+BUNDLE_FILE = "domain.npz"
+PROFILE_FILES = ("profileA.json", "profileB.json")
+
+
+def read_profile(profile_file: Path) -> Tuple[dict, dict, dict]:
+    """Domain (issues and values), issue weights and value utilities of a profile file."""
+    with open(profile_file, "r", encoding="utf-8") as f:
+        raw = json.load(f)["LinearAdditiveUtilitySpace"]
+    value_utilities = {
+        issue: values["DiscreteValueSetUtilities"]["valueUtilities"]
+        for issue, values in raw["issueUtilities"].items()
+    }
+    return raw["domain"]["issuesValues"], raw["issueWeights"], value_utilities
+
+
+def build_bundle(directory: Path) -> Path:
+    """Build the bundle of the domain in `directory` from its profiles and specials.json."""
+    directory = Path(directory)
+    issues_values, _, _ = read_profile(directory / PROFILE_FILES[0])
+    issues = list(issues_values.keys())
+    values = [issues_values[issue]["values"] for issue in issues]
+    num_values = np.array([len(v) for v in values])
+
+    issue_weights = np.zeros((2, len(issues)))
+    value_utilities = np.zeros((2, len(issues), num_values.max()))
+    for p, profile_file in enumerate(PROFILE_FILES):
+        _, weights, utilities = read_profile(directory / profile_file)
+        for i, issue in enumerate(issues):
+            issue_weights[p, i] = weights[issue]
+            for j, value in enumerate(values[i]):
+                value_utilities[p, i, j] = utilities[issue][value]
+
+    bids = np.array(list(product(*[range(n) for n in num_values])), dtype=np.int16)
+    issue_range = np.arange(len(issues))
+    utilities = np.stack(
+        [(value_utilities[p, issue_range, bids] * issue_weights[p]).sum(axis=1) for p in (0, 1)],
+        axis=1,
+    )
+
+    specials_file = directory / "specials.json"
+    if specials_file.exists():
+        # use the precomputed specials, such that all analyses agree with specials.json
+        with open(specials_file, "r", encoding="utf-8") as f:
+            specials = json.load(f)
+        bundle = {"issues": issues, "values": values, "num_values": num_values}
+        pareto = np.array([bid_index(bundle, p["bid"]) for p in specials["pareto_front"]])
+        nash = bid_index(bundle, specials["nash"]["bid"])
+        kalai = bid_index(bundle, specials["kalai"]["bid"])
+    else:
+        pareto = pareto_indices(utilities)
+        front = utilities[pareto]
+        nash = pareto[np.argmax(front.prod(axis=1))]
+        kalai = pareto[np.argmin(np.abs(front[:, 0] - front[:, 1]))]
+    social_welfare = pareto[np.argmax(utilities[pareto].sum(axis=1))]
+    # stable sort, such that bids with equal utility stay in enumeration order
+    order = np.stack([np.argsort(-utilities[:, p], kind="stable") for p in (0, 1)])
+
+    max_values = num_values.max()
+    bundle_file = directory / BUNDLE_FILE
+    # write to a temporary file first, the old bundle may be memory-mapped by other processes
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    # uncompressed, such that the arrays can be memory-mapped
+    with os.fdopen(fd, "wb") as f:
+        np.savez(
+            f,
+            issues=np.array(issues),
+            values=np.array([v + [""] * (max_values - len(v)) for v in values]),
+            num_values=num_values,
+            profiles=np.array(PROFILE_FILES),
+            issue_weights=issue_weights,
+            value_utilities=value_utilities,
+            bids=bids,
+            utilities=utilities,
+            order=order,
+            pareto=np.asarray(pareto, dtype=np.int64),
+            nash=np.int64(nash),
+            kalai=np.int64(kalai),
+            social_welfare=np.int64(social_welfare),
+        )
+    os.replace(tmp_path, bundle_file)
+    return bundle_file
+
+
+def is_bundle_current(directory: Path) -> bool:
+    """Whether the domain has a bundle that is not older than its profiles and specials."""
+    directory = Path(directory)
+    bundle_file = directory / BUNDLE_FILE
+    sources = [directory / f for f in PROFILE_FILES + ("specials.json",)]
+    newest_source = max(f.stat().st_mtime for f in sources if f.exists())
+    return bundle_file.exists() and bundle_file.stat().st_mtime >= newest_source
+
+
+def ensure_bundle(directory: Path) -> Path:
+    """Build the bundle of a domain if it does not exist or is older than its profiles."""
+    if not is_bundle_current(directory):
+        build_bundle(directory)
+    return Path(directory) / BUNDLE_FILE
+
+
+def load_bundle(directory: Path, mmap: bool = True) -> dict:
+    """Load the bundle of the domain in `directory` as a dictionary of arrays.
+
+    Args:
+        directory (Path): domain directory that contains domain.npz.
+        mmap (bool, optional): memory-map the arrays (read-only) instead of reading them.
+            Defaults to True.
+
+    Returns:
+        dict: arrays of the bundle (see module docstring)
+    """
+    bundle_file = Path(directory) / BUNDLE_FILE
+    if not mmap:
+        with np.load(bundle_file) as npz:
+            return {name: npz[name] for name in npz.files}
+
+    bundle = {}
+    with zipfile.ZipFile(bundle_file) as zf, open(bundle_file, "rb") as f:
+        for info in zf.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"{bundle_file} is compressed and cannot be memory-mapped")
+            # skip the local file header, its length fields are at byte 26 and 28
+            f.seek(info.header_offset + 26)
+            name_length, extra_length = struct.unpack("<HH", f.read(4))
+            f.seek(info.header_offset + 30 + name_length + extra_length)
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+            bundle[info.filename[: -len(".npy")]] = np.memmap(
+                bundle_file,
+                dtype=dtype,
+                mode="r",
+                offset=f.tell(),
+                shape=shape,
+                order="F" if fortran_order else "C",
+            )
+    return bundle
+
+
+@lru_cache(maxsize=None)
+def load_bundle_cached(directory: str) -> dict:
+    """Memory-mapped bundle that is opened once per process, e.g. by both agents of a session
+    and by all sessions that a worker runs. The arrays are read-only.
+    """
+    return load_bundle(directory, mmap=True)
+
+
+def bid_index(bundle: dict, bid: dict) -> int:
+    """Row of a bid (dictionary of issue to value name) in the bid and utility arrays."""
+    index = 0
+    for i, issue in enumerate(bundle["issues"]):
+        value_names = list(bundle["values"][i][: bundle["num_values"][i]])
+        index = index * int(bundle["num_values"][i]) + value_names.index(bid[issue])
+    return index
+
+
+def find_bundle(profile_uri: str) -> Optional[Tuple[dict, int]]:
+    """Opt-in helper for agents: load the bundle of the domain of a profile, if it was built.
+
+    Args:
+        profile_uri (str): profile URI or path, e.g. `str(settings.getProfile().getURI())`
+
+    Returns:
+        Optional[Tuple[dict, int]]: the bundle and the index of the profile in the bundle
+            (0 for profile A, 1 for profile B), None if there is no bundle for the profile.
+    """
+    profile_file = Path(profile_uri.split(":", 1)[-1])
+    if not profile_file.parent.joinpath(BUNDLE_FILE).exists():
+        return None
+    if not is_bundle_current(profile_file.parent):
+        return None
+    bundle = load_bundle_cached(str(profile_file.parent.resolve()))
+    profiles = list(bundle["profiles"])
+    if profile_file.name not in profiles:
+        return None
+    return bundle, profiles.index(profile_file.name)
+
+
+def bundle_profile(bundle: dict, profile: int) -> Tuple[dict, dict, dict]:
+    """Domain (issues and values), issue weights and value utilities of a profile of the bundle,
+    in the format of `read_profile`.
+    """
+    issues_values, issue_weights, value_utilities = {}, {}, {}
+    for i, issue in enumerate(bundle["issues"]):
+        issue = str(issue)
+        num_values = int(bundle["num_values"][i])
+        values = [str(value) for value in bundle["values"][i][:num_values]]
+        issues_values[issue] = {"values": values}
+        issue_weights[issue] = float(bundle["issue_weights"][profile, i])
+        value_utilities[issue] = {
+            value: float(utility)
+            for value, utility in zip(values, bundle["value_utilities"][profile, i][:num_values])
+        }
+    return issues_values, issue_weights, value_utilities
+
+
+class BundleUtilitySpace:
+    """Utility function of a profile of the bundle, for analyses that only need `getUtility` of
+    a geniusweb `Bid` and should not parse the profile. Utilities are floats.
+    """
+
+    def __init__(self, bundle: dict, profile: int):
+        _, issue_weights, value_utilities = bundle_profile(bundle, profile)
+        # weighted utility of every value
+        self._weighted_utilities = {
+            issue: {value: issue_weights[issue] * u for value, u in utilities.items()}
+            for issue, utilities in value_utilities.items()
+        }
+
+    def getUtility(self, bid) -> float:
+        return sum(
+            self._weighted_utilities[issue][value.getValue()]
+            for issue, value in bid.getIssueValues().items()
+        )
+
+
+def get_bid(bundle: dict, index: int):
+    """geniusweb `Bid` of a row in the bid and utility arrays."""
+    from geniusweb.issuevalue.Bid import Bid
+    from geniusweb.issuevalue.DiscreteValue import DiscreteValue
+
+    return Bid(
+        {
+            str(issue): DiscreteValue(str(bundle["values"][i][bundle["bids"][index, i]]))
+            for i, issue in enumerate(bundle["issues"])
+        }
+    )
+
+
+def get_sorted_bids(profile_uri: str) -> Optional[Tuple[list, np.ndarray]]:
+    """Opt-in helper for agents: all bids of the domain of a profile as geniusweb `Bid`s, sorted
+    on descending utility for that profile, and their utilities. This replaces enumerating and
+    sorting `AllBidsList` in the Settings handler of an agent.
+
+    Args:
+        profile_uri (str): profile URI or path, e.g. `str(settings.getProfile().getURI())`
+
+    Returns:
+        Optional[Tuple[list, np.ndarray]]: the sorted bids and their utilities (floats), None
+            if there is no up-to-date bundle for the profile.
+    """
+    found = find_bundle(profile_uri)
+    if found is None:
+        return None
+    bundle, profile = found
+
+    from geniusweb.issuevalue.Bid import Bid
+    from geniusweb.issuevalue.DiscreteValue import DiscreteValue
+
+    issues = [str(issue) for issue in bundle["issues"]]
+    values = [
+        [DiscreteValue(str(value)) for value in bundle["values"][i][: bundle["num_values"][i]]]
+        for i in range(len(issues))
+    ]
+    order = np.asarray(bundle["order"][profile])
+    bids = [
+        Bid({issue: values[i][index] for i, (issue, index) in enumerate(zip(issues, row))})
+        for row in np.asarray(bundle["bids"])[order].tolist()
+    ]
+    return bids, np.asarray(bundle["utilities"])[order, profile]
+
+
+def main():
+    domains_dir = Path(sys.argv[1] if len(sys.argv) > 1 else "domains")
+    for directory in sorted(domains_dir.iterdir()):
+        if directory.joinpath(PROFILE_FILES[0]).exists():
+            print(build_bundle(directory))
+
+
+if __name__ == "__main__":
+    main()
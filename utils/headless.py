@@ -0,0 +1,262 @@
+import importlib
+from datetime import datetime, timedelta
+from time import time
+from typing import List, Optional, Tuple
+
+from geniusweb.actions.Accept import Accept
+from geniusweb.actions.Action import Action
+from geniusweb.actions.EndNegotiation import EndNegotiation
+from geniusweb.actions.Offer import Offer
+from geniusweb.actions.PartyId import PartyId
+from geniusweb.inform.ActionDone import ActionDone
+from geniusweb.inform.Agreements import Agreements
+from geniusweb.inform.Finished import Finished
+from geniusweb.inform.Settings import Settings
+from geniusweb.inform.YourTurn import YourTurn
+from geniusweb.progress.Progress import Progress
+from geniusweb.progress.ProgressRounds import ProgressRounds
+from geniusweb.progress.ProgressTime import ProgressTime
+from geniusweb.references.Parameters import Parameters
+from geniusweb.references.ProfileRef import ProfileRef
+from geniusweb.references.ProtocolRef import ProtocolRef
+from pyson.ObjectMapper import ObjectMapper
+from uri.uri import URI
+
+from utils.direct_connection import DirectConnection
+from utils.party_process import ProcessConnection
+from utils.virtual_clock import CLOCK, WALL_TIME_FACTOR, VirtualProgressTime
+
+
+def load_agent_class(class_path: str):
+    module_name, class_name = class_path.rsplit(".", 1)
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+class HeadlessState:
+    """Final state of a headless SAOP session. Exposes the same getters as `SAOPState`
+    that are used to process results.
+    """
+
+    def __init__(self, actions: List[Action], progress: Progress, error: Optional[Exception]):
+        self._actions = actions
+        self._progress = progress
+        self._error = error
+
+    def getActions(self) -> List[Action]:
+        return self._actions
+
+    def getProgress(self) -> Progress:
+        return self._progress
+
+    def getError(self) -> Optional[Exception]:
+        return self._error
+
+
+class HeadlessSAOP:
+    """In-process implementation of the Stacked Alternating Offers Protocol for two parties.
+    The parties are instantiated directly and connected through a `DirectConnection`, turns
+    are handed out by calling the parties from the current thread. This avoids the threads,
+    connection objects and reporting of the geniusweb `Runner`.
+
+    Alternatively, every party can be run in its own process (`ProcessConnection`), such that
+    the parties do not compete for the GIL and a party that exceeds the deadline is cut off.
+
+    With a virtual clock, a time deadline is measured in the CPU time that the parties consume
+    instead of wall time (see `VirtualClock`).
+    """
+
+    def __init__(
+        self,
+        saop_settings: dict,
+        party_processes: bool = False,
+        virtual_clock: bool = False,
+        seed: Optional[int] = None,
+    ):
+        """
+        Args:
+            saop_settings (dict): the "SAOPSettings" part of the settings dictionary that
+                geniusweb requires (see `run_session`).
+            party_processes (bool, optional): run every party in its own process.
+                Defaults to False.
+            virtual_clock (bool, optional): measure a time deadline on the virtual clock.
+                Defaults to False.
+            seed (Optional[int], optional): seed of the random number generators of the party
+                processes, parties in this process use the generators of this process.
+                Defaults to None.
+        """
+        self._participants = []
+        for i, participant in enumerate(saop_settings["participants"], 1):
+            party = participant["TeamInfo"]["parties"][0]
+            class_path = party["party"]["partyref"].split(":", 1)[-1]
+            self._participants.append(
+                {
+                    "id": PartyId(f"{class_path.split('.')[-1]}_{i}"),
+                    "class": class_path,
+                    "parameters": party["party"]["parameters"],
+                    "profile": party["profile"],
+                }
+            )
+        self._saop_settings = saop_settings
+        self._party_processes = party_processes
+        self._deadline = saop_settings["deadline"]
+        self._clock = CLOCK if virtual_clock else None
+        self._seed = seed
+
+        self._actions: List[Action] = []
+        self._error: Optional[Exception] = None
+        self._progress: Progress = None
+        self._peak_rss = {}
+
+    def _create_progress(self) -> Progress:
+        start = datetime.now()
+        if "DeadlineTime" in self._deadline and self._clock is not None:
+            self._clock.reset()
+            return VirtualProgressTime(self._deadline["DeadlineTime"]["durationms"], start)
+        elif "DeadlineTime" in self._deadline:
+            return ProgressTime(self._deadline["DeadlineTime"]["durationms"], start)
+        elif "DeadlineRounds" in self._deadline:
+            deadline = self._deadline["DeadlineRounds"]
+            endtime = start + timedelta(milliseconds=deadline["durationms"])
+            return ProgressRounds(deadline["rounds"], 0, endtime)
+        else:
+            raise ValueError(f"unknown deadline: {self._deadline}")
+
+    def run(self) -> HeadlessState:
+        self._progress = self._create_progress()
+
+        connections = []
+        agreements = Agreements()
+        try:
+            # instantiate and connect the parties
+            for participant in self._participants:
+                if self._party_processes:
+                    connection = ProcessConnection(
+                        participant["class"], participant["id"], self._clock, self._seed
+                    )
+                else:
+                    connection = DirectConnection(participant["id"], self._clock)
+                    party = load_agent_class(participant["class"])()
+                    party.connect(connection)
+                connections.append(connection)
+
+            for participant, connection in zip(self._participants, connections):
+                connection.inform(
+                    Settings(
+                        participant["id"],
+                        ProfileRef(URI(participant["profile"])),
+                        ProtocolRef(URI("SAOP")),
+                        self._progress,
+                        Parameters(participant["parameters"]),
+                    ),
+                    timeout=self._time_left(),
+                )
+
+            agreements = self._negotiate(connections)
+        except TimeoutError:
+            # a party in its own process did not finish before the deadline
+            pass
+        except Exception as e:
+            self._error = e
+        finally:
+            # inform all parties that are still connected that the session has ended
+            for connection in connections:
+                if connection.is_closed():
+                    continue
+                try:
+                    connection.inform(Finished(agreements))
+                except Exception as e:
+                    self._error = self._error or e
+            for participant, connection in zip(self._participants, connections):
+                if isinstance(connection, ProcessConnection):
+                    connection.shutdown()
+                    self._peak_rss[participant["id"].getName()] = connection.peak_rss_mb
+
+        return HeadlessState(self._actions, self._progress, self._error)
+
+    def _time_left(self) -> float:
+        """Time in seconds until the session ends by the time limit of the deadline."""
+        if isinstance(self._progress, VirtualProgressTime):
+            # the virtual deadline is checked by the protocol, this is only a safety limit
+            duration_s = self._progress.getDuration() / 1000 * WALL_TIME_FACTOR
+            return max(self._progress.getStart().timestamp() + duration_s - time(), 0.0)
+        return max(self._progress.getTerminationTime().timestamp() - time(), 0.0)
+
+    def _negotiate(self, connections: list) -> Agreements:
+        last_offer = None
+        turn = 0
+        while not self._progress.isPastDeadline(int(time() * 1000)):
+            participant = self._participants[turn]
+            connection = connections[turn]
+
+            connection.inform(YourTurn(), timeout=self._time_left())
+            sent_actions = connection.pop_actions()
+
+            # actions that arrive after the deadline are ignored, like in geniusweb
+            if self._progress.isPastDeadline(int(time() * 1000)):
+                break
+
+            if len(sent_actions) != 1:
+                raise ValueError(
+                    f"{participant['id']} sent {len(sent_actions)} actions in a single turn"
+                )
+            action = sent_actions[0]
+            if action.getActor() != participant["id"]:
+                raise ValueError(f"{participant['id']} acted as {action.getActor()}")
+            if isinstance(action, Offer) and action.getBid() is None:
+                raise ValueError(f"{participant['id']} offered a `None` bid")
+            if isinstance(action, Accept) and action.getBid() != last_offer:
+                raise ValueError(f"{participant['id']} accepted a bid that was not offered")
+
+            self._actions.append(action)
+            for other_connection in connections:
+                other_connection.inform(ActionDone(action), timeout=self._time_left())
+
+            if isinstance(action, Accept):
+                return Agreements({p["id"]: action.getBid() for p in self._participants})
+            if isinstance(action, EndNegotiation):
+                break
+            last_offer = action.getBid()
+
+            # a round ends after every party has made a move
+            turn = (turn + 1) % len(self._participants)
+            if turn == 0 and isinstance(self._progress, ProgressRounds):
+                self._progress = self._progress.advance()
+
+        return Agreements()
+
+    def get_parties(self) -> List[Tuple[str, str, str]]:
+        """Party ID, agent class name and profile URI of the parties (see `runners.get_parties`)."""
+        return [
+            (p["id"].getName(), p["class"].split(".")[-1], p["profile"])
+            for p in self._participants
+        ]
+
+    def get_peak_rss(self) -> dict:
+        """Peak memory use in MB per party ID, only available for parties in their own process."""
+        return dict(self._peak_rss)
+
+    def get_results(self, state: HeadlessState) -> Tuple[HeadlessState, dict]:
+        """Create the results dictionary in the same format as the serialised `SAOPState`.
+
+        Returns:
+            Tuple[HeadlessState, dict]: results in class format and dict format
+        """
+        mapper = ObjectMapper()
+        progress = state.getProgress()
+        if isinstance(progress, VirtualProgressTime):
+            progress = progress.to_progress_time()
+        results_dict = {
+            "actions": [mapper.toJson(action) for action in state.getActions()],
+            "connections": [p["id"].getName() for p in self._participants],
+            "partyprofiles": {
+                p["id"].getName(): {
+                    "party": {"partyref": f"pythonpath:{p['class']}", "parameters": p["parameters"]},
+                    "profile": p["profile"],
+                }
+                for p in self._participants
+            },
+            "progress": mapper.toJson(progress),
+            "settings": {"SAOPSettings": self._saop_settings},
+            "error": None if state.getError() is None else {"message": repr(state.getError())},
+        }
+        return state, results_dict
@@ -0,0 +1,87 @@
+"""Startup time benchmark of the runner modules, based on `python -X importtime`.
+
+Every module is imported in a fresh interpreter, which is what a single session run and
+every spawned worker of `runners_parallel` pays before the first negotiation starts.
+Run from the root of the repository with `python -m utils.import_time`.
+"""
+import json
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+MODULES = [
+    "utils.runners",
+    "utils.runners_parallel",
+    "utils.runners_adaptive",
+    "utils.plot_trace",
+]
+BASELINE_FILE = Path("benchmarks", "import_time_baseline.json")
+# an import time regression is reported if it is this factor slower than the baseline
+TOLERANCE = 1.5
+
+
+def measure_import_time(module: str, repeat: int = 5) -> dict:
+    """Import time of a module in a fresh interpreter (best of `repeat`).
+
+    Returns:
+        dict: total import time in ms and the import time in ms of the slowest top-level
+            packages (summed over all their modules).
+    """
+    best_total, best_packages = None, None
+    for _ in range(repeat):
+        process = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True,
+            text=True,
+        )
+        if process.returncode != 0:
+            raise RuntimeError(f"failed to import {module}:\n{process.stderr}")
+
+        # lines have the format "import time: self [us] | cumulative | imported package",
+        # nested imports are indented
+        total = 0
+        packages = defaultdict(int)
+        for line in process.stderr.splitlines():
+            if not line.startswith("import time:") or "cumulative" in line:
+                continue
+            self_time, cumulative, name = line[len("import time:"):].split("|")
+            if name.startswith(" ") and not name.startswith("  "):
+                total += int(cumulative)
+            packages[name.strip().split(".")[0]] += int(self_time)
+
+        if best_total is None or total < best_total:
+            best_total, best_packages = total, packages
+
+    slowest = sorted(best_packages.items(), key=lambda x: x[1], reverse=True)[:10]
+    return {
+        "module": module,
+        "import_time_ms": best_total / 1000,
+        "slowest_packages_ms": {name: time_us / 1000 for name, time_us in slowest},
+    }
+
+
+def main():
+    results = [measure_import_time(module) for module in MODULES]
+    for result in results:
+        print(f"{result['module']}: {result['import_time_ms']:.1f} ms")
+
+    if not BASELINE_FILE.exists():
+        BASELINE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        with open(BASELINE_FILE, "w", encoding="utf-8") as f:
+            f.write(json.dumps(results, indent=2))
+        return
+
+    with open(BASELINE_FILE, "r", encoding="utf-8") as f:
+        baseline = {b["module"]: b for b in json.load(f)}
+    for result in results:
+        reference = baseline.get(result["module"])
+        if reference and result["import_time_ms"] > reference["import_time_ms"] * TOLERANCE:
+            print(
+                f"REGRESSION: {result['module']} import time "
+                f"{reference['import_time_ms']:.1f} ms -> {result['import_time_ms']:.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
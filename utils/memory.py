@@ -0,0 +1,127 @@
+import os
+import signal
+import sys
+import threading
+import _thread
+from pathlib import Path
+from typing import List, Optional
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+PAGE_SIZE_MB = os.sysconf("SC_PAGE_SIZE") / 1024**2 if hasattr(os, "sysconf") else None
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of the current process in MB, None if it cannot be measured."""
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux reports kilobytes
+    if sys.platform == "darwin":
+        return max_rss / 1024**2
+    return max_rss / 1024
+
+
+def rss_mb(pid: int) -> Optional[float]:
+    """Current resident set size of a process in MB (Linux only), None if it cannot be measured."""
+    try:
+        with open(f"/proc/{pid}/statm", "r") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE_MB
+    except (OSError, TypeError, IndexError, ValueError):
+        return None
+
+
+def child_pids(pid: int) -> List[int]:
+    """Direct child processes of a process (Linux only)."""
+    pids = []
+    for children_file in Path(f"/proc/{pid}/task").glob("*/children"):
+        try:
+            pids.extend(int(child) for child in children_file.read_text().split())
+        except (OSError, ValueError):
+            continue
+    return pids
+
+
+def available_memory_mb() -> Optional[float]:
+    """Memory available to start new processes in MB (Linux only), None if unknown."""
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+class MemoryWatchdog:
+    """Context manager that samples the memory use (RSS) of the current process and its child
+    processes in a background thread and keeps track of the peak. If a memory budget is given
+    and exceeded while the watchdog is armed (see `arm`), the child processes are killed and a
+    KeyboardInterrupt is raised in the main thread, which aborts the session that is running.
+    The interrupt can arrive just after `disarm`, so callers also have to catch it around the
+    `with` block.
+
+    Only sessions that run in the main thread or in child processes can be aborted, so the
+    budget can be enforced for the headless and process runners but not for the geniusweb
+    runner, whose party threads cannot be stopped.
+
+    Sampling is only supported on Linux, elsewhere `peak_mb` stays None and the budget is not
+    enforced.
+    """
+
+    def __init__(self, budget_mb: Optional[float] = None, interval_s: float = 0.05):
+        self.budget_mb = budget_mb
+        self.interval_s = interval_s
+        self.peak_mb: Optional[float] = None
+        self.exceeded = False
+        self._armed = False
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._watch, daemon=True)
+
+    def _watch(self):
+        pid = os.getpid()
+        while not self._stop.wait(self.interval_s):
+            rss = rss_mb(pid)
+            if rss is None:
+                return
+            children = child_pids(pid)
+            rss += sum(rss_mb(child) or 0.0 for child in children)
+            self.peak_mb = rss if self.peak_mb is None else max(self.peak_mb, rss)
+
+            if self.budget_mb is not None and rss > self.budget_mb:
+                with self._lock:
+                    if not self._armed:
+                        continue
+                    self.exceeded = True
+                    self._armed = False
+                    for child in children:
+                        try:
+                            os.kill(child, signal.SIGKILL)
+                        except OSError:
+                            pass
+                    _thread.interrupt_main()
+                return
+
+    def arm(self):
+        """Allow the watchdog to abort the main thread when the budget is exceeded."""
+        with self._lock:
+            self._armed = True
+
+    def disarm(self):
+        """Stop the watchdog from aborting the main thread, the peak is still sampled."""
+        with self._lock:
+            self._armed = False
+
+    def __enter__(self) -> "MemoryWatchdog":
+        self.peak_mb = rss_mb(os.getpid())
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._stop.set()
+        self._thread.join()
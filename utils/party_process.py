@@ -0,0 +1,173 @@
+import os
+import secrets
+import subprocess
+import sys
+import time
+from multiprocessing.connection import Client, Connection, Listener
+from typing import Optional
+
+AUTHKEY_ENV = "PARTY_PROCESS_AUTHKEY"
+SEED_ENV = "PARTY_PROCESS_SEED"
+# time that a party process gets to start, import its agent and to shut down
+STARTUP_TIMEOUT_S = 60
+SHUTDOWN_TIMEOUT_S = 5
+
+
+class ProcessConnection:
+    """Connection to a party that runs in its own Python process, such that it does not share
+    the GIL (and thus CPU time) with the opponent. The party process is started with
+    `subprocess` instead of `multiprocessing`, which makes it possible to use this connection
+    from within (daemonic) `multiprocessing.Pool` workers.
+
+    Informs are delivered synchronously: `inform` returns after the party has processed the
+    inform and the actions it sent are available through `pop_actions`, similar to
+    `DirectConnection`.
+    """
+
+    def __init__(self, class_path: str, reference=None, clock=None, seed: Optional[int] = None):
+        self._reference = reference
+        self._clock = clock
+        self._actions = []
+        self._closed = False
+        self._busy = False
+        # peak memory use of the party process in MB as reported by the party process itself
+        self.peak_rss_mb: Optional[float] = None
+
+        authkey = secrets.token_bytes(32)
+        self._listener = Listener(authkey=authkey)
+        env = dict(os.environ, **{AUTHKEY_ENV: authkey.hex()})
+        # the party process seeds its random number generators like `run_session` does
+        env.pop(SEED_ENV, None)
+        if seed is not None:
+            env[SEED_ENV] = str(seed)
+        self._process = subprocess.Popen(
+            [sys.executable, "-m", "utils.party_process", str(self._listener.address), class_path],
+            env=env,
+        )
+        self._pipe: Connection = self._listener.accept()
+        self._receive(STARTUP_TIMEOUT_S)
+
+    def _receive(self, timeout: Optional[float]):
+        if not self._pipe.poll(timeout):
+            # the party is still busy, its reply would arrive out of order so we stop talking to it
+            self._closed = True
+            self._busy = True
+            raise TimeoutError("party process did not respond in time")
+        status, actions, closed, self.peak_rss_mb, cpu_time_s = self._pipe.recv()
+        if self._clock is not None:
+            self._clock.advance(cpu_time_s)
+        if status != "ok":
+            self._closed = True
+            raise RuntimeError(f"error in party process: {status}")
+        self._actions.extend(actions)
+        self._closed = closed
+
+    def inform(self, data, timeout: Optional[float] = None):
+        """Deliver an inform to the party and wait until it has been processed.
+
+        Args:
+            data (Inform): Settings, ActionDone, YourTurn or Finished object.
+            timeout (Optional[float], optional): maximum waiting time in seconds. Raises a
+                `TimeoutError` when exceeded. Defaults to None (no limit).
+        """
+        if self._closed:
+            raise IOError("connection is closed")
+        # the party process continues the virtual clock from the current time of our clock
+        self._pipe.send((data, None if self._clock is None else self._clock.elapsed_s()))
+        self._receive(timeout)
+
+    def pop_actions(self) -> list:
+        """Return the actions that were sent since the previous call and clear them."""
+        actions, self._actions = self._actions, []
+        return actions
+
+    def getReference(self):
+        return self._reference
+
+    def is_closed(self) -> bool:
+        return self._closed
+
+    def shutdown(self):
+        """Stop the party process, kill it if it is busy or does not stop by itself."""
+        try:
+            if self._busy:
+                raise OSError("party process is busy")
+            if self._process.poll() is None and not self._closed:
+                self._pipe.send(None)
+            self._process.wait(SHUTDOWN_TIMEOUT_S)
+        except (OSError, subprocess.TimeoutExpired):
+            self._process.kill()
+            self._process.wait()
+        finally:
+            self._closed = True
+            self._pipe.close()
+            self._listener.close()
+
+
+def serve_party(class_path: str, pipe: Connection):
+    """Run a party in the current process, receiving informs from and replying with the
+    actions it sent over `pipe` until the party terminates or None is received.
+
+    Informs are received together with the time of the virtual clock of the session (None if
+    the session uses the wall clock). The CPU time that the party spends on an inform is sent
+    back, such that the session can advance its virtual clock.
+    """
+    # imported here, such that the connection is made before the (slow) imports happen
+    from utils.direct_connection import DirectConnection
+    from utils.headless import load_agent_class
+    from utils.memory import peak_rss_mb
+    from utils.virtual_clock import CLOCK
+
+    # the party process only runs the party, so all CPU time of the process counts
+    CLOCK.cpu_clock = time.process_time
+
+    # seed the random number generators before the party is created, like `run_session`
+    if SEED_ENV in os.environ:
+        import random
+
+        import numpy as np
+
+        random.seed(int(os.environ[SEED_ENV]))
+        np.random.seed(int(os.environ[SEED_ENV]))
+
+    connection = DirectConnection(clock=CLOCK)
+    try:
+        party = load_agent_class(class_path)()
+        party.connect(connection)
+    except Exception as e:
+        pipe.send((repr(e), [], True, peak_rss_mb(), 0.0))
+        return
+    pipe.send(("ok", [], False, peak_rss_mb(), 0.0))
+
+    while not connection.is_closed():
+        message = pipe.recv()
+        if message is None:
+            break
+        data, elapsed_s = message
+        CLOCK.reset(elapsed_s or 0.0)
+        try:
+            connection.inform(data)
+        except Exception as e:
+            actions = connection.pop_actions()
+            pipe.send((repr(e), actions, True, peak_rss_mb(), CLOCK.last_consumed))
+            return
+        pipe.send(
+            (
+                "ok",
+                connection.pop_actions(),
+                connection.is_closed(),
+                peak_rss_mb(),
+                CLOCK.last_consumed,
+            )
+        )
+
+
+def main():
+    address, class_path = sys.argv[1], sys.argv[2]
+    authkey = bytes.fromhex(os.environ[AUTHKEY_ENV])
+    with Client(address, authkey=authkey) as pipe:
+        serve_party(class_path, pipe)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,11 @@
 import os
 from collections import defaultdict
 
-import plotly.graph_objects as go
-
 
 def plot_trace(results_trace: dict, plot_file: str):
+    # plotly is imported here, as it is slow to import and only needed when plotting
+    import plotly.graph_objects as go
+
     utilities = defaultdict(lambda: defaultdict(lambda: {"x": [], "y": [], "bids": []}))
     accept = {"x": [], "y": [], "bids": []}
     for index, action in enumerate(results_trace["actions"], 1):
@@ -1,11 +1,15 @@
+import json
+import random
 import shutil
 from collections import defaultdict
+from functools import lru_cache
 from itertools import permutations
-from math import factorial, prod
+from math import dist, prod
 from pathlib import Path
-from typing import Tuple
+from typing import List, Optional, Tuple
 
-import pandas as pd
+from geniusweb.actions.Accept import Accept
+from geniusweb.actions.Offer import Offer
 from geniusweb.profile.utilityspace.LinearAdditiveUtilitySpace import (
     LinearAdditiveUtilitySpace,
 )
@@ -21,19 +25,81 @@ from pyson.ObjectMapper import ObjectMapper
 from uri.uri import URI
 
 from utils.ask_proceed import ask_proceed
+from utils.headless import HeadlessSAOP
+from utils.session_cache import SessionCache
+
+# file names of the two profiles of a domain
+PROFILE_NAMES = ["profileA.json", "profileB.json"]
+
+
+# time limit of round based sessions in case no "deadline_time_ms" is provided
+DEFAULT_ROUNDS_DURATION_MS = 60000
+
+
+def get_deadline_settings(settings: dict) -> dict:
+    """Extract the deadline entries ("deadline_time_ms" and/or "deadline_rounds" and "clock")
+    from settings."""
+    deadline_settings = {
+        k: settings[k] for k in ("deadline_time_ms", "deadline_rounds", "clock") if k in settings
+    }
+    assert deadline_settings, "either deadline_time_ms or deadline_rounds is required"
+    return deadline_settings
+
+
+def create_deadline(settings: dict) -> Tuple[dict, dict]:
+    """Create the geniusweb deadline dictionary from the session settings. If "deadline_rounds"
+    is provided, the session ends after that many rounds and "deadline_time_ms" only serves as
+    a time limit in case the agents are too slow. Otherwise the session ends after
+    "deadline_time_ms" milliseconds. With "clock" set to "virtual", these milliseconds are
+    measured in CPU time consumed by the agents instead of wall time (see `VirtualClock`).
+
+    Returns:
+        Tuple[dict, dict]: geniusweb deadline dictionary and deadline description for the summary
+    """
+    deadline_rounds = settings.get("deadline_rounds")
+    deadline_time_ms = settings.get("deadline_time_ms")
+    clock = settings.get("clock", "wall")
+    assert clock in ("wall", "virtual")
+
+    if deadline_rounds is not None:
+        assert clock == "wall", "the virtual clock only applies to time deadlines"
+        if deadline_time_ms is None:
+            deadline_time_ms = DEFAULT_ROUNDS_DURATION_MS
+        assert isinstance(deadline_rounds, int) and deadline_rounds > 0
+        assert isinstance(deadline_time_ms, int) and deadline_time_ms > 0
+        deadline = {"DeadlineRounds": {"rounds": deadline_rounds, "durationms": deadline_time_ms}}
+        deadline_summary = {"deadline_mode": "rounds", "deadline_rounds": deadline_rounds}
+    else:
+        assert isinstance(deadline_time_ms, int) and deadline_time_ms > 0
+        deadline = {"DeadlineTime": {"durationms": deadline_time_ms}}
+        deadline_mode = "virtual_time" if clock == "virtual" else "time"
+        deadline_summary = {"deadline_mode": deadline_mode, "deadline_time_ms": deadline_time_ms}
+
+    return deadline, deadline_summary
 
 
 def run_session(settings) -> Tuple[dict, dict]:
     agents = settings["agents"]
     profiles = settings["profiles"]
-    deadline_time_ms = settings["deadline_time_ms"]
+    deadline, deadline_summary = create_deadline(settings)
+    runner_type = settings.get("runner", "geniusweb")
+    trace = settings.get("trace", True)
 
     # quick and dirty checks
     assert isinstance(agents, list) and len(agents) == 2
     assert isinstance(profiles, list) and len(profiles) == 2
-    assert isinstance(deadline_time_ms, int) and deadline_time_ms > 0
+    assert runner_type in ("geniusweb", "headless", "process")
+    virtual_clock = settings.get("clock", "wall") == "virtual"
+    assert not (virtual_clock and runner_type == "geniusweb"), "use a headless or process runner"
     assert all(["class" in agent for agent in agents])
 
+    # seed the random number generators that agents commonly use
+    if "seed" in settings:
+        import numpy as np
+
+        random.seed(settings["seed"])
+        np.random.seed(settings["seed"])
+
     for agent in agents:
         if "parameters" in agent:
             if "storage_dir" in agent["parameters"]:
@@ -79,26 +145,54 @@ def run_session(settings) -> Tuple[dict, dict]:
                     }
                 },
             ],
-            # "deadline": {"DeadlineRounds": {"rounds": rounds, "durationms": 60000}},
-            "deadline": {"DeadlineTime": {"durationms": deadline_time_ms}},
+            "deadline": deadline,
         }
     }
 
-    # parse settings dict to settings object
-    settings_obj = ObjectMapper().parse(settings_full, NegoSettings)
+    if runner_type in ("headless", "process"):
+        # run the negotiation session without the geniusweb runner, either with the agents in
+        # this process or with every agent in its own process
+        protocol = HeadlessSAOP(
+            settings_full["SAOPSettings"],
+            runner_type == "process",
+            virtual_clock,
+            settings.get("seed"),
+        )
+        results_class = protocol.run()
+        parties = protocol.get_parties()
+        if trace:
+            _, results_dict = protocol.get_results(results_class)
+    else:
+        # parse settings dict to settings object
+        settings_obj = ObjectMapper().parse(settings_full, NegoSettings)
 
-    # create the negotiation session runner object
-    runner = Runner(settings_obj, ClassPathConnectionFactory(), StdOutReporter(), 0)
+        # create the negotiation session runner object
+        runner = Runner(settings_obj, ClassPathConnectionFactory(), StdOutReporter(), 0)
 
-    # run the negotiation session
-    runner.run()
+        # run the negotiation session
+        runner.run()
 
-    # get results from the session in class format and dict format
-    results_class: SAOPState = runner.getProtocol().getState()
-    results_dict: dict = ObjectMapper().toJson(results_class)["SAOPState"]
+        # get results from the session in class format and dict format
+        results_class: SAOPState = runner.getProtocol().getState()
+        if trace:
+            results_dict: dict = ObjectMapper().toJson(results_class)["SAOPState"]
+        else:
+            parties = get_parties(results_class)
 
-    # add utilities to the results and create a summary
-    results_trace, results_summary = process_results(results_class, results_dict)
+    if trace:
+        # add utilities to the results and create a summary
+        results_trace, results_summary = process_results(results_class, results_dict)
+    else:
+        # only create a summary, based on the final action
+        results_trace, results_summary = None, process_results_summary(results_class, parties)
+
+    # record which deadline was used
+    results_summary.update(deadline_summary)
+
+    # record the peak memory use of agents that ran in their own process
+    if runner_type == "process":
+        for party_id, peak_rss in protocol.get_peak_rss().items():
+            results_summary[f"peak_rss_mb_{party_id.split('_')[-1]}"] = peak_rss
 
     return results_trace, results_summary
 
@@ -107,11 +201,22 @@ def run_tournament(tournament_settings: dict) -> Tuple[list, list]:
     # create agent permutations, ensures that every agent plays against every other agent on both sides of a profile set.
     agents = tournament_settings["agents"]
     profile_sets = tournament_settings["profile_sets"]
-    deadline_time_ms = tournament_settings["deadline_time_ms"]
+    cache = get_session_cache(tournament_settings)
 
-    num_sessions = (factorial(len(agents)) // factorial(len(agents) - 2)) * len(
-        profile_sets
-    )
+    tournament_steps = []
+    for profiles in profile_sets:
+        # quick an dirty check
+        assert isinstance(profiles, list) and len(profiles) == 2
+        for agent_duo in permutations(agents, 2):
+            # create session settings dict
+            tournament_steps.append(
+                create_session_settings(tournament_settings, list(agent_duo), profiles)
+            )
+
+    # obtain the results of sessions that were run before from the cache
+    cached_results = [cache.get(settings) if cache else None for settings in tournament_steps]
+
+    num_sessions = sum(results is None for results in cached_results)
     if num_sessions > 100:
         message = (
             f"WARNING: this would run {num_sessions} negotiation sessions. Proceed?"
@@ -121,30 +226,44 @@ def run_tournament(tournament_settings: dict) -> Tuple[list, list]:
             exit()
 
     tournament_results = []
-    tournament_steps = []
-    for profiles in profile_sets:
-        # quick an dirty check
-        assert isinstance(profiles, list) and len(profiles) == 2
-        for agent_duo in permutations(agents, 2):
-            # create session settings dict
-            settings = {
-                "agents": list(agent_duo),
-                "profiles": profiles,
-                "deadline_time_ms": deadline_time_ms,
-            }
-
+    for settings, session_results_summary in zip(tournament_steps, cached_results):
+        if session_results_summary is None:
             # run a single negotiation session
             _, session_results_summary = run_session(settings)
+            if cache and session_results_summary["result"] != "ERROR":
+                cache.put(settings, session_results_summary)
 
-            # assemble results
-            tournament_steps.append(settings)
-            tournament_results.append(session_results_summary)
+        # assemble results
+        tournament_results.append(session_results_summary)
 
     tournament_results_summary = process_tournament_results(tournament_results)
 
     return tournament_steps, tournament_results, tournament_results_summary
 
 
+def create_session_settings(tournament_settings: dict, agents: list, profiles: list) -> dict:
+    """Create the settings of a single session of a tournament. The trace of the session is
+    not created, as only the summary is used in tournaments.
+    """
+    settings = {
+        "agents": agents,
+        "profiles": profiles,
+        **get_deadline_settings(tournament_settings),
+        "runner": tournament_settings.get("runner", "geniusweb"),
+        "trace": False,
+    }
+    if "seed" in tournament_settings:
+        settings["seed"] = tournament_settings["seed"]
+    return settings
+
+
+def get_session_cache(tournament_settings: dict) -> Optional[SessionCache]:
+    """Session result cache if a "cache_dir" is set in the tournament settings."""
+    if tournament_settings.get("cache_dir"):
+        return SessionCache(tournament_settings["cache_dir"])
+    return None
+
+
 def process_results(results_class: SAOPState, results_dict: dict):
     # dict to translate geniusweb agent reference to Python class name
     agent_translate = {
@@ -203,12 +322,145 @@ def process_results(results_class: SAOPState, results_dict: dict):
         results_summary[f"utility_{position}"] = utilities_final[i]
     results_summary["nash_product"] = prod(utilities_final)
     results_summary["social_welfare"] = sum(utilities_final)
+    profile_uris = [
+        results_dict["partyprofiles"][actor]["profile"] for actor in results_dict["connections"]
+    ]
+    results_summary.update(get_pareto_metrics(profile_uris, utilities_final))
     results_summary["result"] = result
 
     return results_dict, results_summary
 
 
+def get_parties(results_class: SAOPState) -> List[Tuple[str, str, str]]:
+    """Obtain party ID, agent class name and profile URI of the parties in a session, in the
+    order of the connections.
+    """
+    party_profiles = results_class.getPartyProfiles()
+    parties = []
+    for party_id in results_class.getConnections():
+        party_profile = party_profiles[party_id]
+        class_name = str(party_profile.getParty().getPartyRef().getURI()).split(".")[-1]
+        parties.append((party_id.getName(), class_name, str(party_profile.getProfile().getURI())))
+    return parties
+
+
+def process_results_summary(results_class, parties: List[Tuple[str, str, str]]) -> dict:
+    """Create the same summary as `process_results`, but without serialising the session state
+    and without computing the utilities of every offer. Only the final action is evaluated.
+
+    Args:
+        results_class (SAOPState): state of the session (or any object with `getActions`)
+        parties (List[Tuple[str, str, str]]): party ID, agent class name and profile URI per party
+
+    Returns:
+        dict: results summary
+    """
+    actions = results_class.getActions()
+    results_summary = {
+        "num_offers": sum(isinstance(action, (Offer, Accept)) for action in actions)
+    }
+
+    if not actions:
+        utilities_final = [0, 0]
+        result = "ERROR"
+    elif isinstance(actions[-1], Accept):
+        bid = actions[-1].getBid()
+        utilities_final = [
+            float(get_utility_function(profile_uri).getUtility(bid))
+            for _, _, profile_uri in parties
+        ]
+        result = "agreement"
+    else:
+        utilities_final = [0, 0]
+        result = "failed"
+
+    for i, (party_id, class_name, _) in enumerate(parties):
+        position = party_id.split("_")[-1]
+        results_summary[f"agent_{position}"] = class_name
+        results_summary[f"utility_{position}"] = utilities_final[i]
+    results_summary["nash_product"] = prod(utilities_final)
+    results_summary["social_welfare"] = sum(utilities_final)
+    profile_uris = [profile_uri for _, _, profile_uri in parties]
+    results_summary.update(get_pareto_metrics(profile_uris, utilities_final))
+    results_summary["result"] = result
+
+    return results_summary
+
+
+@lru_cache(maxsize=None)
+def get_domain_specials(domain_dir: str) -> Optional[dict]:
+    """Utilities (of profile A and B) of the Pareto front, Nash bid and Kalai bid of a domain.
+    Loaded once per process from the domain bundle if it was built, otherwise from
+    specials.json. Returns None if neither exists.
+    """
+    directory = Path(domain_dir)
+    if directory.joinpath("domain.npz").exists():
+        # imported here, numpy is only needed when there is a bundle
+        from utils.domain_bundle import load_bundle_cached
+
+        bundle = load_bundle_cached(str(directory.resolve()))
+
+        def point(index) -> tuple:
+            return tuple(float(u) for u in bundle["utilities"][index])
+
+        return {
+            "pareto_front": [point(index) for index in bundle["pareto"]],
+            "nash": point(bundle["nash"]),
+            "kalai": point(bundle["kalai"]),
+        }
+
+    specials_file = directory.joinpath("specials.json")
+    if not specials_file.exists():
+        return None
+    with open(specials_file, "r", encoding="utf-8") as f:
+        specials = json.load(f)
+    return {
+        "pareto_front": [tuple(bid["utility"]) for bid in specials["pareto_front"]],
+        "nash": tuple(specials["nash"]["utility"]),
+        "kalai": tuple(specials["kalai"]["utility"]),
+    }
+
+
+def get_pareto_metrics(profile_uris: List[str], utilities: List[float]) -> dict:
+    """Euclidean distance of the outcome of a session to the Pareto front (closest Pareto
+    optimal bid), the Nash bid and the Kalai bid in utility space. A failed session has
+    utilities (0, 0). Returns an empty dict if the profiles are not profile A and B of a
+    domain with precomputed specials.
+
+    Args:
+        profile_uris (List[str]): profile URIs of the parties
+        utilities (List[float]): final utilities of the parties, in the same order
+    """
+    profile_files = [Path(uri.split(":", 1)[-1]) for uri in profile_uris]
+    profile_names = [profile_file.name for profile_file in profile_files]
+    if len({f.parent for f in profile_files}) != 1 or sorted(profile_names) != PROFILE_NAMES:
+        return {}
+    specials = get_domain_specials(str(profile_files[0].parent))
+    if specials is None:
+        return {}
+
+    # order the utilities like the specials: profile A, profile B
+    point = [utilities[profile_names.index(name)] for name in PROFILE_NAMES]
+    return {
+        "pareto_distance": min(dist(point, front) for front in specials["pareto_front"]),
+        "nash_distance": dist(point, specials["nash"]),
+        "kalai_distance": dist(point, specials["kalai"]),
+    }
+
+
+@lru_cache(maxsize=None)
 def get_utility_function(profile_uri) -> LinearAdditiveUtilitySpace:
+    """Utility function of a profile, read from the domain bundle if it was built (see
+    `BundleUtilitySpace`), otherwise parsed from the profile file.
+    """
+    if Path(str(profile_uri).split(":", 1)[-1]).parent.joinpath("domain.npz").exists():
+        # imported here, numpy is only needed when there is a bundle
+        from utils.domain_bundle import BundleUtilitySpace, find_bundle
+
+        found = find_bundle(str(profile_uri))
+        if found is not None:
+            return BundleUtilitySpace(*found)
+
     profile_connection = ProfileConnectionFactory.create(
         URI(profile_uri), StdOutReporter()
     )
@@ -220,10 +472,17 @@ def get_utility_function(profile_uri) -> LinearAdditiveUtilitySpace:
 
 def process_tournament_results(tournament_results):
     agent_result_raw = defaultdict(lambda: defaultdict(list))
+    agent_peak_rss = defaultdict(list)
     tournament_results_summary = defaultdict(lambda: defaultdict(int))
     for session_results in tournament_results:
         agents = {k: v for k, v in session_results.items() if k.startswith("agent")}
         for agent_id, agent_class in agents.items():
+            # memory use of the agent's own process if available, otherwise of the session
+            peak_rss = session_results.get(
+                f"peak_rss_mb_{agent_id.split('_')[1]}", session_results.get("peak_rss_mb")
+            )
+            if peak_rss is not None:
+                agent_peak_rss[agent_class].append(peak_rss)
             agent_result_raw[agent_class]["utility"].append(
                 session_results[f"utility_{agent_id.split('_')[1]}"]
             )
@@ -233,18 +492,20 @@ def process_tournament_results(tournament_results):
             agent_result_raw[agent_class]["social_welfare"].append(
                 session_results["social_welfare"]
             )
-            if "num_offers" in session_results:
-                agent_result_raw[agent_class]["num_offers"].append(
-                    session_results["num_offers"]
-                )
+            for metric in ("num_offers", "pareto_distance", "nash_distance", "kalai_distance"):
+                if metric in session_results:
+                    agent_result_raw[agent_class][metric].append(session_results[metric])
             tournament_results_summary[agent_class][session_results["result"]] += 1
 
     for agent, stats in agent_result_raw.items():
         num_session = len(stats["utility"])
         for desc, stat in stats.items():
-            stat_average = sum(stat) / num_session
+            # not every session summary has every metric (e.g. results of older sessions)
+            stat_average = sum(stat) / len(stat)
             tournament_results_summary[agent][f"avg_{desc}"] = stat_average
         tournament_results_summary[agent]["count"] = num_session
+    for agent, peak_rss in agent_peak_rss.items():
+        tournament_results_summary[agent]["max_peak_rss_mb"] = max(peak_rss)
 
     column_order = [
         "avg_utility",
@@ -256,6 +517,11 @@ def process_tournament_results(tournament_results):
         "failed",
         "ERROR",
     ]
+    for metric in ("avg_pareto_distance", "avg_nash_distance", "avg_kalai_distance"):
+        if any(metric in stats for stats in tournament_results_summary.values()):
+            column_order.insert(column_order.index("count"), metric)
+    if agent_peak_rss:
+        column_order.insert(column_order.index("count"), "max_peak_rss_mb")
     column_type = {
         "count": int,
         "agreement": int,
@@ -263,6 +529,9 @@ def process_tournament_results(tournament_results):
         "ERROR": int,
     }
 
+    # pandas is imported here, as it is slow to import and only needed for tournaments
+    import pandas as pd
+
     # results dictionary to dataframe
     tournament_results_summary = pd.DataFrame(tournament_results_summary).T
 
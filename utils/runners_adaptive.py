@@ -0,0 +1,176 @@
+import random
+from collections import defaultdict
+from itertools import permutations
+from math import sqrt
+from multiprocessing import Pool
+from statistics import NormalDist, mean, stdev
+from typing import Dict, List, Tuple
+
+from utils.runners import (
+    create_session_settings,
+    get_session_cache,
+    process_tournament_results,
+    run_session,
+)
+
+
+def get_session_utilities(session_results_summary: dict) -> Dict[str, float]:
+    """Obtain the utility per agent class name from a session summary."""
+    return {
+        agent_class: session_results_summary[f"utility_{agent_id.split('_')[1]}"]
+        for agent_id, agent_class in session_results_summary.items()
+        if agent_id.startswith("agent")
+    }
+
+
+def get_confidence_intervals(
+    utilities: Dict[str, List[float]], z: float
+) -> Dict[str, Tuple[float, float]]:
+    """Normal approximation confidence interval of the mean utility per agent."""
+    intervals = {}
+    for agent, agent_utilities in utilities.items():
+        if len(agent_utilities) < 2:
+            intervals[agent] = (0.0, 1.0)
+            continue
+        radius = z * stdev(agent_utilities) / sqrt(len(agent_utilities))
+        average = mean(agent_utilities)
+        intervals[agent] = (average - radius, average + radius)
+    return intervals
+
+
+def get_unresolved_agents(
+    utilities: Dict[str, List[float]], z: float, min_sessions: int, tolerance: float
+) -> set:
+    """Agents of which the rank is not yet known. An agent is resolved once its confidence
+    interval does not overlap with that of any other agent, or once the interval is smaller
+    than `tolerance` (agents that are that close are considered tied).
+    """
+    intervals = get_confidence_intervals(utilities, z)
+
+    unresolved = set()
+    for agent, (low, high) in intervals.items():
+        if len(utilities[agent]) < min_sessions:
+            unresolved.add(agent)
+        elif high - low <= tolerance:
+            continue
+        elif any(
+            low <= other_high and other_low <= high
+            for other, (other_low, other_high) in intervals.items()
+            if other != agent
+        ):
+            unresolved.add(agent)
+
+    return unresolved
+
+
+def run_tournament(tournament_settings: dict) -> Tuple[list, list]:
+    """Run a tournament that samples sessions adaptively instead of running every permutation
+    of agents on every profile set. Sessions are run in batches, each batch only involves agents
+    whose rank (based on average utility) is not yet statistically separated from the others.
+    The tournament stops once all ranks are resolved, all sessions are run or "max_sessions"
+    is reached.
+
+    Besides the regular tournament settings, the following optional settings are used:
+    "confidence" (0.95), "batch_size" (sessions per unresolved agent per batch, 4),
+    "min_sessions" (per agent, 10), "tolerance" (0.01), "max_sessions" (None), "seed" (None),
+    "parallel" (run a batch in a process pool, False) and "cache_dir" (see `SessionCache`).
+    """
+    agents = tournament_settings["agents"]
+    profile_sets = tournament_settings["profile_sets"]
+    cache = get_session_cache(tournament_settings)
+    confidence = tournament_settings.get("confidence", 0.95)
+    batch_size = tournament_settings.get("batch_size", 4)
+    min_sessions = tournament_settings.get("min_sessions", 10)
+    tolerance = tournament_settings.get("tolerance", 0.01)
+    max_sessions = tournament_settings.get("max_sessions")
+    parallel = tournament_settings.get("parallel", False)
+    rng = random.Random(tournament_settings.get("seed"))
+
+    # quick an dirty check
+    assert all([isinstance(profiles, list) and len(profiles) == 2 for profiles in profile_sets])
+    assert 0 < confidence < 1
+
+    # Bonferroni corrected z-value, as every agent is compared to all others
+    z = NormalDist().inv_cdf(1 - (1 - confidence) / (2 * len(agents)))
+
+    # all sessions of the full tournament in random order
+    remaining_sessions = [
+        (profiles, agent_duo)
+        for profiles in profile_sets
+        for agent_duo in permutations(agents, 2)
+    ]
+    rng.shuffle(remaining_sessions)
+    if max_sessions is not None:
+        remaining_sessions = remaining_sessions[:max_sessions]
+
+    agent_names = {agent["class"]: agent["class"].split(".")[-1] for agent in agents}
+    utilities = {name: [] for name in agent_names.values()}
+
+    tournament_results = []
+    tournament_steps = []
+    pool = Pool() if parallel else None
+    try:
+        while remaining_sessions:
+            unresolved = get_unresolved_agents(utilities, z, min_sessions, tolerance)
+            if not unresolved:
+                break
+
+            # select sessions in which the unresolved agents participate
+            batch, skipped = [], []
+            batch_count = defaultdict(int)
+            for profiles, agent_duo in remaining_sessions:
+                names = [agent_names[agent["class"]] for agent in agent_duo]
+                if any(n in unresolved and batch_count[n] < batch_size for n in names):
+                    for name in names:
+                        batch_count[name] += 1
+                    batch.append(
+                        create_session_settings(tournament_settings, list(agent_duo), profiles)
+                    )
+                else:
+                    skipped.append((profiles, agent_duo))
+            remaining_sessions = skipped
+
+            # all sessions of the unresolved agents have been run
+            if not batch:
+                break
+
+            # only run the sessions of which the results are not cached
+            cached_results = [cache.get(settings) if cache else None for settings in batch]
+            to_run = [s for s, results in zip(batch, cached_results) if results is None]
+            if pool is not None:
+                results = pool.map(run_session, to_run)
+            else:
+                results = [run_session(settings) for settings in to_run]
+
+            new_results = iter([session_results_summary for _, session_results_summary in results])
+            for settings, session_results_summary in zip(batch, cached_results):
+                if session_results_summary is None:
+                    session_results_summary = next(new_results)
+                    if cache and session_results_summary["result"] != "ERROR":
+                        cache.put(settings, session_results_summary)
+
+                for name, utility in get_session_utilities(session_results_summary).items():
+                    utilities[name].append(utility)
+                tournament_steps.append(settings)
+                tournament_results.append(session_results_summary)
+
+            print(
+                f"Ran {len(tournament_results)} sessions, unresolved agents: {len(unresolved)}"
+            )
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    tournament_results_summary = process_tournament_results(tournament_results)
+
+    # add the confidence intervals of the average utility
+    intervals = get_confidence_intervals(utilities, z)
+    tournament_results_summary["utility_ci_low"] = [
+        intervals[agent][0] for agent in tournament_results_summary.index
+    ]
+    tournament_results_summary["utility_ci_high"] = [
+        intervals[agent][1] for agent in tournament_results_summary.index
+    ]
+
+    return tournament_steps, tournament_results, tournament_results_summary
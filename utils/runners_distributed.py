@@ -0,0 +1,302 @@
+"""Tournament runner that distributes sessions over any number of worker processes on any
+number of hosts. The coordinator (`run_tournament`) publishes the sessions to a work queue in
+a shared SQLite file, workers pull, run and report them and the coordinator merges the results
+in the same format as the other runners.
+
+Start additional workers on other hosts that can reach the queue file (e.g. on a network
+share) from the root of the repository with:
+
+    python -m utils.runners_distributed <queue file> [<number of workers>]
+"""
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import sys
+import time
+from itertools import permutations
+from multiprocessing import Process, freeze_support
+from typing import List, Optional, Tuple
+
+from utils.runners import (
+    create_session_settings,
+    get_session_cache,
+    process_tournament_results,
+)
+from utils.runners_parallel import create_error_summary, get_memory_budget, run_session_wrapper
+
+# sessions that are claimed for longer than this are assumed to be lost (e.g. the worker host
+# went down) and are handed out again
+DEFAULT_SESSION_TIMEOUT_S = 3600
+# sessions that were handed out this many times without being reported (e.g. because they
+# crash their worker every time) are reported as failed
+DEFAULT_MAX_ATTEMPTS = 3
+POLL_INTERVAL_S = 1.0
+
+
+class SessionQueue:
+    """Work queue of negotiation sessions in a SQLite file. Claiming a session happens in an
+    exclusive transaction, so any number of workers can use the same file concurrently.
+    """
+
+    def __init__(self, path: str, max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        self.max_attempts = max_attempts
+        self._connection = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self._connection.execute(
+            """CREATE TABLE IF NOT EXISTS sessions (
+                tournament TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                task TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                worker TEXT,
+                claimed REAL,
+                summary TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (tournament, position)
+            )"""
+        )
+        # queue files created before sessions were counted
+        columns = [row[1] for row in self._connection.execute("PRAGMA table_info(sessions)")]
+        if "attempts" not in columns:
+            self._connection.execute(
+                "ALTER TABLE sessions ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0"
+            )
+
+    def publish(self, tournament: str, tasks: list):
+        """Add the tasks of a tournament, tasks that were published before are kept, such that
+        an interrupted tournament resumes where it stopped.
+        """
+        with self._transaction():
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO sessions (tournament, position, task) VALUES (?, ?, ?)",
+                [(tournament, position, json.dumps(task)) for position, task in tasks],
+            )
+
+    def claim(self, worker: str) -> Optional[Tuple[str, int, list]]:
+        """Claim a pending session, returns None if there is no pending session."""
+        with self._transaction():
+            row = self._connection.execute(
+                "SELECT tournament, position, task FROM sessions WHERE status = 'pending' LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            self._connection.execute(
+                "UPDATE sessions SET status = 'running', worker = ?, claimed = ?, "
+                "attempts = attempts + 1 WHERE tournament = ? AND position = ?",
+                (worker, time.time(), row[0], row[1]),
+            )
+        return row[0], row[1], json.loads(row[2])
+
+    def complete(self, tournament: str, position: int, summary: dict):
+        with self._transaction():
+            self._connection.execute(
+                "UPDATE sessions SET status = 'done', summary = ? "
+                "WHERE tournament = ? AND position = ?",
+                (json.dumps(summary), tournament, position),
+            )
+
+    def requeue_stale(self, timeout_s: float) -> int:
+        """Hand out sessions again that were claimed more than `timeout_s` seconds ago."""
+        return self._requeue("claimed < ?", (time.time() - timeout_s,))
+
+    def requeue_workers(self, workers: List[str]) -> int:
+        """Hand out sessions again that were claimed by workers that are known to be gone."""
+        if not workers:
+            return 0
+        placeholders = ", ".join("?" * len(workers))
+        return self._requeue(f"worker IN ({placeholders})", tuple(workers))
+
+    def _requeue(self, condition: str, parameters: tuple) -> int:
+        """Hand out the running sessions that match `condition` again, or report them as failed
+        with an error summary if they were already handed out `max_attempts` times.
+        """
+        with self._transaction():
+            rows = self._connection.execute(
+                "SELECT tournament, position, task, attempts FROM sessions "
+                f"WHERE status = 'running' AND {condition}",
+                parameters,
+            ).fetchall()
+            for tournament, position, task, attempts in rows:
+                if attempts < self.max_attempts:
+                    self._connection.execute(
+                        "UPDATE sessions SET status = 'pending', worker = NULL, claimed = NULL "
+                        "WHERE tournament = ? AND position = ?",
+                        (tournament, position),
+                    )
+                else:
+                    settings, _ = json.loads(task)
+                    summary = dict(create_error_summary(settings), failed_attempts=attempts)
+                    self._connection.execute(
+                        "UPDATE sessions SET status = 'failed', summary = ? "
+                        "WHERE tournament = ? AND position = ?",
+                        (json.dumps(summary), tournament, position),
+                    )
+        return len(rows)
+
+    def num_unfinished(self, tournament: str) -> int:
+        return self._connection.execute(
+            "SELECT COUNT(*) FROM sessions "
+            "WHERE tournament = ? AND status NOT IN ('done', 'failed')",
+            (tournament,),
+        ).fetchone()[0]
+
+    def results(self, tournament: str) -> dict:
+        """Session results summaries of the finished (or failed) sessions of a tournament by
+        position.
+        """
+        rows = self._connection.execute(
+            "SELECT position, summary FROM sessions "
+            "WHERE tournament = ? AND status IN ('done', 'failed')",
+            (tournament,),
+        )
+        return {position: json.loads(summary) for position, summary in rows}
+
+    def close(self):
+        self._connection.close()
+
+    def _transaction(self):
+        return _Transaction(self._connection)
+
+
+class _Transaction:
+    def __init__(self, connection: sqlite3.Connection):
+        self._connection = connection
+
+    def __enter__(self):
+        # take the write lock immediately, such that two workers cannot claim the same session
+        self._connection.execute("BEGIN IMMEDIATE")
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._connection.execute("ROLLBACK" if exc_type else "COMMIT")
+
+
+def worker_name(pid: int) -> str:
+    """Name under which a worker process on this host claims sessions."""
+    return f"{socket.gethostname()}:{pid}"
+
+
+def run_worker(queue_path: str, stop_when_empty: bool = True):
+    """Pull sessions from the queue, run them and report the results summary.
+
+    Args:
+        queue_path (str): path to the SQLite queue file.
+        stop_when_empty (bool, optional): stop when there are no pending sessions, otherwise
+            wait for new sessions indefinitely. Defaults to True.
+    """
+    worker = worker_name(os.getpid())
+    queue = SessionQueue(queue_path)
+    try:
+        while True:
+            claimed = queue.claim(worker)
+            if claimed is None:
+                if stop_when_empty:
+                    return
+                time.sleep(POLL_INTERVAL_S)
+                continue
+            tournament, position, (settings, memory_budget_mb) = claimed
+            session_results_summary = run_session_wrapper((settings, memory_budget_mb))
+            queue.complete(tournament, position, session_results_summary)
+    finally:
+        queue.close()
+
+
+def start_workers(queue_path: str, num_workers: int, stop_when_empty: bool = True) -> list:
+    workers = [
+        Process(target=run_worker, args=(queue_path, stop_when_empty)) for _ in range(num_workers)
+    ]
+    for worker in workers:
+        worker.start()
+    return workers
+
+
+def run_tournament(tournament_settings: dict) -> Tuple[list, list]:
+    """Run a tournament through the work queue at `tournament_settings["queue"]`. The
+    coordinator starts "local_workers" worker processes (defaults to the number of CPUs) and
+    waits until all sessions have been reported, workers on other hosts can join at any time.
+    Sessions of local workers that died are handed out again immediately, other sessions after
+    "session_timeout_s". A session that was handed out "max_attempts" times is reported as an
+    error.
+    """
+    # create agent permutations, ensures that every agent plays against every other agent on both sides of a profile set.
+    agents = tournament_settings["agents"]
+    profile_sets = tournament_settings["profile_sets"]
+    cache = get_session_cache(tournament_settings)
+
+    tournament_steps = []
+    for profiles in profile_sets:
+        # quick an dirty check
+        assert isinstance(profiles, list) and len(profiles) == 2
+        for agent_duo in permutations(agents, 2):
+            # create session settings dict
+            tournament_steps.append(
+                create_session_settings(tournament_settings, list(agent_duo), profiles)
+            )
+
+    # obtain the results of sessions that were run before from the cache, only queue the others
+    cached_results = [cache.get(settings) if cache else None for settings in tournament_steps]
+    memory_budget_mb = get_memory_budget(tournament_settings)
+    tasks = [
+        (position, (settings, memory_budget_mb))
+        for position, (settings, results) in enumerate(zip(tournament_steps, cached_results))
+        if results is None
+    ]
+    if cache:
+        print(f"Found {len(tournament_steps) - len(tasks)} cached sessions")
+
+    # the same tournament settings give the same tournament ID, so a restart resumes
+    tournament = hashlib.sha256(json.dumps(tournament_steps, sort_keys=True).encode()).hexdigest()
+    queue = SessionQueue(
+        tournament_settings["queue"], tournament_settings.get("max_attempts", DEFAULT_MAX_ATTEMPTS)
+    )
+    queue.publish(tournament, tasks)
+
+    num_local_workers = tournament_settings.get("local_workers", os.cpu_count() or 1)
+    workers = start_workers(tournament_settings["queue"], num_local_workers)
+
+    session_timeout_s = tournament_settings.get("session_timeout_s", DEFAULT_SESSION_TIMEOUT_S)
+    try:
+        while queue.num_unfinished(tournament) > 0:
+            # a local worker that died (e.g. killed when out of memory) cannot report its session
+            alive_workers = {worker_name(w.pid) for w in workers if w.is_alive()}
+            dead_workers = [
+                worker_name(w.pid)
+                for w in workers
+                if not w.is_alive() and worker_name(w.pid) not in alive_workers
+            ]
+            requeued = queue.requeue_workers(dead_workers) + queue.requeue_stale(session_timeout_s)
+            # local workers stop when the queue is empty, restart them for requeued sessions
+            if requeued and not any(w.is_alive() for w in workers):
+                workers += start_workers(tournament_settings["queue"], num_local_workers)
+            time.sleep(POLL_INTERVAL_S)
+        new_results = queue.results(tournament)
+    finally:
+        queue.close()
+        for worker in workers:
+            worker.join()
+
+    for position, _ in tasks:
+        if cache and new_results[position]["result"] != "ERROR":
+            cache.put(tournament_steps[position], new_results[position])
+
+    # assemble results
+    tournament_results = [
+        session_results_summary if session_results_summary is not None else new_results[position]
+        for position, session_results_summary in enumerate(cached_results)
+    ]
+
+    tournament_results_summary = process_tournament_results(tournament_results)
+
+    return tournament_steps, tournament_results, tournament_results_summary
+
+
+def main():
+    queue_path = sys.argv[1]
+    num_workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count() or 1
+    for worker in start_workers(queue_path, num_workers, stop_when_empty=False):
+        worker.join()
+
+
+if __name__ == "__main__":
+    freeze_support()
+    main()
@@ -1,284 +1,198 @@
-import shutil
-from collections import defaultdict
+import os
+import time
 from itertools import permutations
-from math import factorial, prod
+from multiprocessing import Pool, Queue
 from pathlib import Path
-from typing import Tuple
-
-import pandas as pd
-from geniusweb.profile.utilityspace.LinearAdditiveUtilitySpace import (
-    LinearAdditiveUtilitySpace,
-)
-from geniusweb.profileconnection.ProfileConnectionFactory import (
-    ProfileConnectionFactory,
-)
-from geniusweb.protocol.NegoSettings import NegoSettings
-from geniusweb.protocol.session.saop.SAOPState import SAOPState
-from geniusweb.simplerunner.ClassPathConnectionFactory import ClassPathConnectionFactory
-from geniusweb.simplerunner.NegoRunner import StdOutReporter
-from geniusweb.simplerunner.Runner import Runner
-from pyson.ObjectMapper import ObjectMapper
-from uri.uri import URI
+from typing import Optional, Tuple
 
 from utils.ask_proceed import ask_proceed
+from utils.domain_bundle import ensure_bundle
+from utils.memory import MemoryWatchdog, available_memory_mb
+from utils.scheduling import benchmark_cores, cpu_time, pin_to_cpu
+from utils.runners import (
+    create_session_settings,
+    get_session_cache,
+    process_tournament_results,
+    run_session,
+)
 
 
-def run_session(settings) -> Tuple[dict, dict]:
-    agents = settings["agents"]
-    profiles = settings["profiles"]
-    deadline_time_ms = settings["deadline_time_ms"]
-
-    # quick and dirty checks
-    assert isinstance(agents, list) and len(agents) == 2
-    assert isinstance(profiles, list) and len(profiles) == 2
-    assert isinstance(deadline_time_ms, int) and deadline_time_ms > 0
-    assert all(["class" in agent for agent in agents])
-
-    for agent in agents:
-        if "parameters" in agent:
-            if "storage_dir" in agent["parameters"]:
-                storage_dir = Path(agent["parameters"]["storage_dir"])
-                if not storage_dir.exists():
-                    storage_dir.mkdir(parents=True)
-
-    # file path to uri
-    profiles_uri = [f"file:{x}" for x in profiles]
-
-    # create full settings dictionary that geniusweb requires
-    settings_full = {
-        "SAOPSettings": {
-            "participants": [
-                {
-                    "TeamInfo": {
-                        "parties": [
-                            {
-                                "party": {
-                                    "partyref": f"pythonpath:{agents[0]['class']}",
-                                    "parameters": agents[0]["parameters"]
-                                    if "parameters" in agents[0]
-                                    else {},
-                                },
-                                "profile": profiles_uri[0],
-                            }
-                        ]
-                    }
-                },
-                {
-                    "TeamInfo": {
-                        "parties": [
-                            {
-                                "party": {
-                                    "partyref": f"pythonpath:{agents[1]['class']}",
-                                    "parameters": agents[1]["parameters"]
-                                    if "parameters" in agents[1]
-                                    else {},
-                                },
-                                "profile": profiles_uri[1],
-                            }
-                        ]
-                    }
-                },
-            ],
-            # "deadline": {"DeadlineRounds": {"rounds": rounds, "durationms": 60000}},
-            "deadline": {"DeadlineTime": {"durationms": deadline_time_ms}},
-        }
-    }
-
-    # parse settings dict to settings object
-    settings_obj = ObjectMapper().parse(settings_full, NegoSettings)
+# queue of free CPU cores in "benchmark" scheduling mode, set in every worker by `init_worker`
+free_cores: Optional[Queue] = None
 
-    # create the negotiation session runner object
-    runner = Runner(settings_obj, ClassPathConnectionFactory(), StdOutReporter(), 0)
 
-    # run the negotiation session
-    runner.run()
+def init_worker(cores: Optional[Queue]):
+    global free_cores
+    free_cores = cores
 
-    # get results from the session in class format and dict format
-    results_class: SAOPState = runner.getProtocol().getState()
-    results_dict: dict = ObjectMapper().toJson(results_class)["SAOPState"]
 
-    # add utilities to the results and create a summary
-    results_trace, results_summary = process_results(results_class, results_dict)
+def run_session_wrapper(args):
+    settings, memory_budget_mb = args
+
+    # in benchmark mode, the session (including party processes) runs on a core of its own
+    core = free_cores.get() if free_cores is not None else None
+    if core is not None:
+        pin_to_cpu(core)
+
+    try:
+        start_wall, start_cpu = time.perf_counter(), cpu_time()
+        watchdog = MemoryWatchdog(memory_budget_mb)
+        # the interrupt of the watchdog may also arrive after the session while it is being
+        # disarmed, so it is caught around the whole block
+        try:
+            with watchdog:
+                watchdog.arm()
+                try:
+                    _, session_results_summary = run_session(settings)
+                finally:
+                    watchdog.disarm()
+        except BaseException:
+            # agents in the main thread may swallow the interrupt or raise another exception
+            # instead, the session is reported as over budget below in any case
+            if not watchdog.exceeded:
+                raise
+        if watchdog.exceeded:
+            session_results_summary = create_memory_exceeded_summary(settings)
+        session_results_summary["wall_time_s"] = time.perf_counter() - start_wall
+        session_results_summary["cpu_time_s"] = cpu_time() - start_cpu
+        session_results_summary["peak_rss_mb"] = watchdog.peak_mb
+    finally:
+        if core is not None:
+            free_cores.put(core)
+
+    return session_results_summary
+
+
+def create_error_summary(settings: dict) -> dict:
+    """Results summary of a session that could not be completed."""
+    results_summary = {"num_offers": 0}
+    for position, agent in enumerate(settings["agents"], 1):
+        results_summary[f"agent_{position}"] = agent["class"].split(".")[-1]
+        results_summary[f"utility_{position}"] = 0
+    results_summary["nash_product"] = 0
+    results_summary["social_welfare"] = 0
+    results_summary["result"] = "ERROR"
+    return results_summary
+
+
+def create_memory_exceeded_summary(settings: dict) -> dict:
+    """Results summary of a session that was aborted because it exceeded the memory budget."""
+    results_summary = create_error_summary(settings)
+    results_summary["memory_exceeded"] = True
+    return results_summary
+
+
+def get_memory_budget(tournament_settings: dict) -> Optional[float]:
+    """Memory budget of the sessions of a tournament in MB, None if there is no budget. A budget
+    requires the headless or process runner, the geniusweb runner runs the parties in threads
+    that cannot be stopped when a session is aborted.
+    """
+    memory_budget_mb = tournament_settings.get("memory_budget_mb")
+    runner_type = tournament_settings.get("runner", "geniusweb")
+    assert not (memory_budget_mb and runner_type == "geniusweb"), (
+        "memory_budget_mb requires the headless or process runner"
+    )
+    return memory_budget_mb
 
-    return results_trace, results_summary
 
+def wait_for_capacity(pending: list, max_pending: int, memory_budget_mb: Optional[float]):
+    """Block until another session can be started. At most `max_pending` sessions run at once
+    and if a memory budget is set, a new session is only started when the system has at least
+    that amount of memory available (unless no session is running at all).
+    """
+    while True:
+        pending[:] = [result for result in pending if not result.ready()]
+        if not pending:
+            return
+        if len(pending) < max_pending:
+            available_mb = available_memory_mb()
+            if memory_budget_mb is None or available_mb is None or available_mb >= memory_budget_mb:
+                return
+        time.sleep(0.1)
 
-from multiprocessing import Pool
-from itertools import permutations
-
-def run_session_wrapper(args):
-    return run_session(*args)
 
 def run_tournament(tournament_settings: dict) -> Tuple[list, list]:
     # create agent permutations, ensures that every agent plays against every other agent on both sides of a profile set.
     agents = tournament_settings["agents"]
     profile_sets = tournament_settings["profile_sets"]
-    deadline_time_ms = tournament_settings["deadline_time_ms"]
+    cache = get_session_cache(tournament_settings)
+
+    tournament_steps = []
+    for profiles in profile_sets:
+        # quick an dirty check
+        assert isinstance(profiles, list) and len(profiles) == 2
+        for agent_duo in permutations(agents, 2):
+            # create session settings dict
+            tournament_steps.append(
+                create_session_settings(tournament_settings, list(agent_duo), profiles)
+            )
 
-    num_sessions = (factorial(len(agents)) // factorial(len(agents) - 2)) * len(profile_sets)
+    # obtain the results of sessions that were run before from the cache, only run the others
+    cached_results = [cache.get(settings) if cache else None for settings in tournament_steps]
+    memory_budget_mb = get_memory_budget(tournament_settings)
+    args_list = [
+        (settings, memory_budget_mb)
+        for settings, results in zip(tournament_steps, cached_results)
+        if results is None
+    ]
+    if cache:
+        print(f"Found {len(tournament_steps) - len(args_list)} cached sessions")
+
+    num_sessions = len(args_list)
     if num_sessions > 100:
         message = f"WARNING: this would run {num_sessions} negotiation sessions. Proceed?"
         if not ask_proceed(message):
             print("Exiting script")
             exit()
 
-    tournament_results = []
-    tournament_steps = []
-    with Pool() as pool:
-        args_list = []
-        for profiles in profile_sets:
-            # quick an dirty check
-            assert isinstance(profiles, list) and len(profiles) == 2
-            for agent_duo in permutations(agents, 2):
-                # create session settings dict
-                settings = {
-                    "agents": list(agent_duo),
-                    "profiles": profiles,
-                    "deadline_time_ms": deadline_time_ms,
-                }
-                args_list.append((settings,))
-
-        results = pool.map(run_session_wrapper, args_list)
-        for settings, session_results_summary in results:
-            # assemble results
-            tournament_steps.append(settings)
-            tournament_results.append(session_results_summary)
-
-    tournament_results_summary = process_tournament_results(tournament_results)
-
-    return tournament_steps, tournament_results, tournament_results_summary
-
-
-def process_results(results_class: SAOPState, results_dict: dict):
-    # dict to translate geniusweb agent reference to Python class name
-    agent_translate = {
-        k: v["party"]["partyref"].split(".")[-1]
-        for k, v in results_dict["partyprofiles"].items()
-    }
-
-    results_summary = {"num_offers": 0}
-
-    # check if there are any actions (could have crashed)
-    if results_dict["actions"]:
-        # obtain utility functions
-        utility_funcs = {
-            k: get_utility_function(v["profile"])
-            for k, v in results_dict["partyprofiles"].items()
-        }
-
-        # iterate both action classes and dict entries
-        actions_iter = zip(results_class.getActions(), results_dict["actions"])
-
-        for action_class, action_dict in actions_iter:
-            if "Offer" in action_dict:
-                offer = action_dict["Offer"]
-            elif "Accept" in action_dict:
-                offer = action_dict["Accept"]
-            else:
-                continue
-
-            # add bid utility of both agents if bid is not None
-            bid = action_class.getBid()
-            if bid is None:
-                raise ValueError(
-                    f"Found `None` value in sequence of actions: {action_class}"
-                )
-            else:
-                offer["utilities"] = {
-                    k: float(v.getUtility(bid)) for k, v in utility_funcs.items()
-                }
-
-            results_summary["num_offers"] += 1
-
-        # gather a summary of results
-        if "Accept" in action_dict:
-            utilities_final = list(offer["utilities"].values())
-            result = "agreement"
-        else:
-            utilities_final = [0, 0]
-            result = "failed"
+    # build the domain bundles once in this process, such that the workers memory-map them for
+    # the result processing and agents that opt in with `get_sorted_bids` (e.g. super_agent and
+    # agent18) do not enumerate and sort the bid space in every session
+    if tournament_settings.get("domain_bundles", True):
+        directories = {Path(p).parent for settings, _ in args_list for p in settings["profiles"]}
+        for directory in directories:
+            ensure_bundle(directory)
+
+    # in "benchmark" scheduling mode, one worker runs per physical core and every session is
+    # pinned to a free core, such that hyperthread siblings and migrations between cores do
+    # not affect the number of rounds that sessions with a time deadline get
+    cores = None
+    if tournament_settings.get("scheduling", "default") == "benchmark":
+        core_list = benchmark_cores(tournament_settings.get("headroom_cores", 0))
+        cores = Queue()
+        for core in core_list:
+            cores.put(core)
+        processes = len(core_list)
     else:
-        utilities_final = [0, 0]
-        result = "ERROR"
-
-    for i, actor in enumerate(results_dict["connections"]):
-        position = actor.split("_")[-1]
-        results_summary[f"agent_{position}"] = agent_translate[actor]
-        results_summary[f"utility_{position}"] = utilities_final[i]
-    results_summary["nash_product"] = prod(utilities_final)
-    results_summary["social_welfare"] = sum(utilities_final)
-    results_summary["result"] = result
-
-    return results_dict, results_summary
-
-
-def get_utility_function(profile_uri) -> LinearAdditiveUtilitySpace:
-    profile_connection = ProfileConnectionFactory.create(
-        URI(profile_uri), StdOutReporter()
-    )
-    profile = profile_connection.getProfile()
-    assert isinstance(profile, LinearAdditiveUtilitySpace)
-
-    return profile
-
-
-def process_tournament_results(tournament_results):
-    agent_result_raw = defaultdict(lambda: defaultdict(list))
-    tournament_results_summary = defaultdict(lambda: defaultdict(int))
-    for session_results in tournament_results:
-        agents = {k: v for k, v in session_results.items() if k.startswith("agent")}
-        for agent_id, agent_class in agents.items():
-            agent_result_raw[agent_class]["utility"].append(
-                session_results[f"utility_{agent_id.split('_')[1]}"]
-            )
-            agent_result_raw[agent_class]["nash_product"].append(
-                session_results["nash_product"]
-            )
-            agent_result_raw[agent_class]["social_welfare"].append(
-                session_results["social_welfare"]
-            )
-            if "num_offers" in session_results:
-                agent_result_raw[agent_class]["num_offers"].append(
-                    session_results["num_offers"]
-                )
-            tournament_results_summary[agent_class][session_results["result"]] += 1
-
-    for agent, stats in agent_result_raw.items():
-        num_session = len(stats["utility"])
-        for desc, stat in stats.items():
-            stat_average = sum(stat) / num_session
-            tournament_results_summary[agent][f"avg_{desc}"] = stat_average
-        tournament_results_summary[agent]["count"] = num_session
-
-    column_order = [
-        "avg_utility",
-        "avg_nash_product",
-        "avg_social_welfare",
-        "avg_num_offers",
-        "count",
-        "agreement",
-        "failed",
-        "ERROR",
+        processes = os.cpu_count() or 1
+
+    # with a memory budget, every session runs in a fresh worker such that the memory of an
+    # aborted session is released and the measured peak memory use belongs to that session only
+    with Pool(
+        processes,
+        initializer=init_worker,
+        initargs=(cores,),
+        maxtasksperchild=1 if memory_budget_mb else None,
+    ) as pool:
+        pending, async_results = [], []
+        for args in args_list:
+            wait_for_capacity(pending, processes, memory_budget_mb)
+            async_result = pool.apply_async(run_session_wrapper, (args,))
+            pending.append(async_result)
+            async_results.append(async_result)
+        results = [async_result.get() for async_result in async_results]
+
+    new_results = iter(results)
+    for (settings, _), session_results_summary in zip(args_list, results):
+        if cache and session_results_summary["result"] != "ERROR":
+            cache.put(settings, session_results_summary)
+
+    # assemble results
+    tournament_results = [
+        session_results_summary if session_results_summary is not None else next(new_results)
+        for session_results_summary in cached_results
     ]
-    column_type = {
-        "count": int,
-        "agreement": int,
-        "failed": int,
-        "ERROR": int,
-    }
-
-    # results dictionary to dataframe
-    tournament_results_summary = pd.DataFrame(tournament_results_summary).T
 
-    # clean data and types
-    tournament_results_summary = tournament_results_summary.fillna(0)
-    for column in column_order:
-        if column not in tournament_results_summary:
-            tournament_results_summary[column] = 0
-    tournament_results_summary = tournament_results_summary.astype(column_type)
-
-    # structure dataframe
-    tournament_results_summary.sort_values("avg_utility", ascending=False, inplace=True)
-    tournament_results_summary = tournament_results_summary[column_order]
+    tournament_results_summary = process_tournament_results(tournament_results)
 
-    return tournament_results_summary
+    return tournament_steps, tournament_results, tournament_results_summary
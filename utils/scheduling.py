@@ -0,0 +1,47 @@
+import os
+import time
+from pathlib import Path
+from typing import List
+
+
+def available_cpus() -> List[int]:
+    """Logical CPUs that the current process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def physical_cores() -> List[int]:
+    """One logical CPU per physical core that the current process may run on. Hyperthread
+    siblings of a core are left out, as sessions on siblings slow each other down. Falls back
+    to all available logical CPUs if the CPU topology is unknown (non-Linux systems).
+    """
+    cores = {}
+    for cpu in available_cpus():
+        siblings_file = Path(f"/sys/devices/system/cpu/cpu{cpu}/topology/thread_siblings_list")
+        try:
+            siblings = siblings_file.read_text().strip()
+        except OSError:
+            return available_cpus()
+        cores.setdefault(siblings, cpu)
+    return sorted(cores.values())
+
+
+def benchmark_cores(headroom_cores: int = 0) -> List[int]:
+    """Physical cores to run benchmark sessions on, leaving `headroom_cores` cores free for the
+    operating system and the main process. At least one core is always returned.
+    """
+    cores = physical_cores()
+    return cores[: max(len(cores) - headroom_cores, 1)]
+
+
+def pin_to_cpu(cpu: int):
+    """Restrict the current process (and the processes it starts) to a single logical CPU."""
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, {cpu})
+
+
+def cpu_time() -> float:
+    """CPU time in seconds used by the current process and its terminated child processes."""
+    times = os.times()
+    return time.process_time() + times.children_user + times.children_system
@@ -0,0 +1,186 @@
+import ast
+import hashlib
+import json
+import os
+import tempfile
+from importlib.util import resolve_name
+from pathlib import Path
+from typing import Optional
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+IGNORED_NAMES = {"__pycache__", ".DS_Store"}
+# modules that run a session, the session engine is `run_session` and what it imports from utils
+ENGINE_MODULES = ["utils.runners"]
+
+
+def get_module_directory(module_name: str) -> Optional[Path]:
+    """Directory that contains the source of a module, without importing it."""
+    path = ROOT_DIR.joinpath(*module_name.split("."))
+    if path.is_dir():
+        return path
+    if path.with_suffix(".py").exists():
+        return path.parent
+    # the name can also refer to an object inside a module
+    if "." in module_name:
+        return get_module_directory(module_name.rsplit(".", 1)[0])
+    return None
+
+
+def get_imported_modules(source_file: Path) -> list:
+    """Names of the modules that a source file imports (absolute or relative), including
+    function level imports. For `from x import y`, both `x` and `x.y` are returned, as `y`
+    can be a module.
+    """
+    package = ".".join(source_file.parent.relative_to(ROOT_DIR).parts)
+    names = []
+    for node in ast.walk(ast.parse(source_file.read_bytes())):
+        if isinstance(node, ast.ImportFrom):
+            module = resolve_name("." * node.level + (node.module or ""), package)
+            names.append(module)
+            names.extend(f"{module}.{alias.name}" for alias in node.names)
+        elif isinstance(node, ast.Import):
+            names.extend(alias.name for alias in node.names)
+    return names
+
+
+def get_utils_files(module_names: list) -> list:
+    """Source files of the modules of the `utils` package among `module_names`, plus the
+    `utils` modules that they import, found recursively.
+    """
+    to_visit = [n for n in module_names if n == "utils" or n.startswith("utils.")]
+    files = set()
+    while to_visit:
+        path = ROOT_DIR.joinpath(*to_visit.pop().split("."))
+        if path.with_suffix(".py").is_file():
+            source_file = path.with_suffix(".py")
+        elif path.joinpath("__init__.py").is_file():
+            source_file = path.joinpath("__init__.py")
+        else:
+            # an object inside a module, the module itself is visited as well
+            continue
+        if source_file in files:
+            continue
+        files.add(source_file)
+        to_visit.extend(n for n in get_imported_modules(source_file) if n.startswith("utils."))
+    return sorted(files)
+
+
+def get_agent_sources(class_path: str) -> list:
+    """Find the sources an agent depends on. This is the directory of the agent's module,
+    plus the directories of the modules in the `agents` package that it imports (e.g.
+    `agents.time_dependent_agent` for the Boulware agent), found recursively, plus the files
+    of the `utils` modules that these import (e.g. `utils.domain_bundle`).
+    """
+    to_visit = [class_path.rsplit(".", 1)[0]]
+    directories = set()
+    imported = []
+    while to_visit:
+        directory = get_module_directory(to_visit.pop())
+        if directory is None or directory in directories:
+            continue
+        directories.add(directory)
+
+        # look for imports of other agent modules
+        for source_file in directory.rglob("*.py"):
+            names = get_imported_modules(source_file)
+            imported.extend(names)
+            to_visit.extend(n for n in names if n.startswith("agents."))
+
+    # subdirectories are already covered by their parent directory
+    directories = sorted(d for d in directories if not any(p in directories for p in d.parents))
+    return directories + get_utils_files(imported)
+
+
+def hash_path(path: Path, hasher):
+    """Hash the contents of a file or of all files in a directory."""
+    if path.is_file():
+        hasher.update(str(path.relative_to(ROOT_DIR)).encode())
+        hasher.update(path.read_bytes())
+        return
+    for file in sorted(path.rglob("*")):
+        if file.is_dir() or IGNORED_NAMES.intersection(file.parts) or file.suffix == ".pyc":
+            continue
+        hasher.update(str(file.relative_to(path)).encode())
+        hasher.update(file.read_bytes())
+
+
+class SessionCache:
+    """Content addressed cache of session result summaries. The key of a session is the hash
+    of the source code of both agents (including the `utils` modules they import), the
+    contents of both profiles, the agent parameters, the deadline, the runner, the source code
+    of the session engine and the seed, such that changing any of them invalidates the cached
+    results of exactly the affected sessions.
+
+    Note that data that agents learn over sessions (`storage_dir`) is not part of the key.
+    """
+
+    def __init__(self, cache_dir: str):
+        self._cache_dir = Path(cache_dir)
+        self._agent_hashes = {}
+        self._profile_hashes = {}
+        self._engine_hash = None
+
+    def _hash_agent(self, class_path: str) -> str:
+        if class_path not in self._agent_hashes:
+            hasher = hashlib.sha256()
+            for path in get_agent_sources(class_path):
+                hash_path(path, hasher)
+            self._agent_hashes[class_path] = hasher.hexdigest()
+        return self._agent_hashes[class_path]
+
+    def _hash_engine(self) -> str:
+        if self._engine_hash is None:
+            hasher = hashlib.sha256()
+            for path in get_utils_files(ENGINE_MODULES):
+                hash_path(path, hasher)
+            self._engine_hash = hasher.hexdigest()
+        return self._engine_hash
+
+    def _hash_profile(self, profile: str) -> str:
+        if profile not in self._profile_hashes:
+            with open(profile, "rb") as f:
+                self._profile_hashes[profile] = hashlib.sha256(f.read()).hexdigest()
+        return self._profile_hashes[profile]
+
+    def key(self, settings: dict) -> str:
+        key_data = {
+            "agents": [
+                {
+                    "class": agent["class"],
+                    "source": self._hash_agent(agent["class"]),
+                    "parameters": agent.get("parameters", {}),
+                }
+                for agent in settings["agents"]
+            ],
+            "profiles": [self._hash_profile(profile) for profile in settings["profiles"]],
+            "deadline_time_ms": settings.get("deadline_time_ms"),
+            "deadline_rounds": settings.get("deadline_rounds"),
+            "runner": settings.get("runner", "geniusweb"),
+            "engine": self._hash_engine(),
+            "seed": settings.get("seed"),
+        }
+        # only added for the virtual clock, such that existing cache entries remain valid
+        if settings.get("clock", "wall") != "wall":
+            key_data["clock"] = settings["clock"]
+        return hashlib.sha256(json.dumps(key_data, sort_keys=True).encode()).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self._cache_dir.joinpath(key[:2], f"{key}.json")
+
+    def get(self, settings: dict) -> Optional[dict]:
+        """Return the cached session summary, None if the session was not cached."""
+        path = self._path(self.key(settings))
+        if not path.exists():
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)["summary"]
+
+    def put(self, settings: dict, session_results_summary: dict):
+        path = self._path(self.key(settings))
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # write to a temporary file first, so that concurrent readers never see partial files
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"settings": settings, "summary": session_results_summary}))
+        os.replace(tmp_path, path)
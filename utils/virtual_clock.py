@@ -0,0 +1,73 @@
+import time
+from contextlib import contextmanager
+
+from geniusweb.progress.ProgressTime import ProgressTime
+
+# a party that runs in its own process without a time limit could block a session forever,
+# so the wall time of a virtual clock session is limited to this factor times its duration
+WALL_TIME_FACTOR = 10
+
+
+class VirtualClock:
+    """Session clock that only advances by the CPU time that the parties consume while they
+    handle informs. Sessions with a virtual clock give the same results whether they run in
+    isolation or share the machine with many other sessions.
+
+    There is a single clock per process (`CLOCK`). By default, it measures the CPU time of the
+    calling thread, which is the thread that runs the parties in a headless session. A party
+    process measures the CPU time of the whole process instead (see `party_process`).
+    """
+
+    def __init__(self, cpu_clock=time.thread_time):
+        self.cpu_clock = cpu_clock
+        self._elapsed = 0.0
+        self._measure_start = None
+        self.last_consumed = 0.0
+
+    def reset(self, elapsed_s: float = 0.0):
+        self._elapsed = elapsed_s
+        self._measure_start = None
+
+    def elapsed_s(self) -> float:
+        """Elapsed virtual time in seconds, including the running measurement."""
+        if self._measure_start is None:
+            return self._elapsed
+        return self._elapsed + self.cpu_clock() - self._measure_start
+
+    def advance(self, seconds: float):
+        """Advance the clock by CPU time that was consumed elsewhere (e.g. in a party process)."""
+        self._elapsed += seconds
+
+    @contextmanager
+    def measure(self):
+        """Advance the clock by the CPU time consumed within the context."""
+        self._measure_start = self.cpu_clock()
+        try:
+            yield
+        finally:
+            self.last_consumed = self.cpu_clock() - self._measure_start
+            self._elapsed += self.last_consumed
+            self._measure_start = None
+
+
+CLOCK = VirtualClock()
+
+
+class VirtualProgressTime(ProgressTime):
+    """`ProgressTime` that ignores the (wall) time it is given and measures progress on the
+    virtual clock of the current process instead. Agents can keep calling
+    `progress.get(time() * 1000)`.
+    """
+
+    def _virtual_time_ms(self) -> int:
+        return int(self.getStart().timestamp() * 1000 + CLOCK.elapsed_s() * 1000)
+
+    def get(self, currentTimeMs: int) -> float:
+        return super().get(self._virtual_time_ms())
+
+    def isPastDeadline(self, currentTimeMs: int) -> bool:
+        return super().isPastDeadline(self._virtual_time_ms())
+
+    def to_progress_time(self) -> ProgressTime:
+        """Plain `ProgressTime` with the same duration and start, used to serialise results."""
+        return ProgressTime(self.getDuration(), self.getStart())